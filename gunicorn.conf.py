@@ -0,0 +1,62 @@
+# Gunicorn configuration, picked up automatically from the working directory:
+#
+#     gunicorn                                   # WSGI, gthread workers
+#     GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker \
+#     GUNICORN_APP=smart_task_manager.asgi:application gunicorn   # ASGI, needed for live task events
+#
+# Under WSGI the live events script is not rendered and its endpoint answers 204.
+#
+# All sizes can be overridden through the environment.
+
+import multiprocessing
+import os
+
+
+cpu_count = multiprocessing.cpu_count()
+
+wsgi_app = os.getenv("GUNICORN_APP", "smart_task_manager.wsgi:application")
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", 1 if "uvicorn" in worker_class else 2))
+# About 2 * CPUs + 1 requests in flight in total, split across the threads of each worker.
+workers = int(os.getenv("WEB_CONCURRENCY", max(1, (cpu_count * 2 + 1) // threads)))
+
+# Import Django, the URLconf and the templates once in the master; workers fork from it.
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+keepalive = 5
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = max_requests // 10
+
+
+def _log_steps(log, who, steps):
+    for step in steps:
+        log.info("%s warm-up: %s x%d in %.1f ms", who, step.name, step.count, step.seconds * 1000)
+
+
+def when_ready(server):
+    # Runs in the master after the app is preloaded, so forked workers inherit the
+    # populated URL resolvers and the cached compiled templates.
+    from smart_task_manager.warmup import warm_up
+
+    _log_steps(server.log, "master", warm_up(database=False))
+
+
+def post_fork(server, worker):
+    # Connections must never be shared across processes.
+    from django.db import connections
+
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    # Called before the worker starts accepting requests, to make a broken database
+    # fail fast. Request threads open their own connections, so this one is closed.
+    from django.db import connections
+
+    from smart_task_manager.warmup import warm_up
+
+    _log_steps(worker.log, f"worker {worker.pid}", warm_up(urls=False, templates=False))
+    connections.close_all()
@@ -56,6 +56,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'task_manager.profiling.ProfilerMiddleware',
+    'task_manager.slow_queries.SlowQueryMiddleware',
 ]
 
 ROOT_URLCONF = 'smart_task_manager.urls'
@@ -95,6 +97,38 @@ DATABASES = {
     )
 }
 
+# Tasks of a project live on the database named by Project.shard, one of TASK_SHARDS
+# (the first one holds tasks without a project). Extra aliases are configured with
+# DATABASE_URL_<ALIAS>, e.g. TASK_SHARDS=default,big and DATABASE_URL_BIG.
+TASK_SHARDS = env.list('TASK_SHARDS', default=['default'])
+
+for alias in TASK_SHARDS:
+    if alias not in DATABASES:
+        DATABASES[alias] = dj_database_url.parse(env(f'DATABASE_URL_{alias.upper()}'), conn_max_age=600)
+
+DATABASE_ROUTERS = ['task_manager.sharding.ShardRouter']
+
+# Lookup table versions and cache refresh locks must be shared by every worker, so
+# the default is a table in the database ("manage.py createcachetable"). Prefer
+# Redis when there is one, e.g. CACHE_URL=redis://localhost:6379/1; a per-process
+# cache such as locmemcache:// is only fit for development ("manage.py check
+# --deploy" warns about it).
+CACHES = {
+    'default': env.cache_url('CACHE_URL', default='dbcache://task_manager_cache'),
+}
+
+# Seconds between checks of the shared version keys of the cached lookup tables
+# (positions, task types, teams and projects).
+LOOKUP_CACHE_CHECK_INTERVAL = 1
+
+# Cached list data (see task_manager.caching): seconds a value is fresh, how much
+# longer it may be served while one request refreshes it, and the refresh lock lifetime.
+CACHING_TIMEOUT = 60
+
+CACHING_STALE_TIMEOUT = 300
+
+CACHING_LOCK_TIMEOUT = 10
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -153,3 +187,25 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_REDIRECT_URL = "/"
 
 LOGOUT_REDIRECT_URL = "/"
+
+# Live task updates are pushed over Server-Sent Events when served through asgi.py;
+# under WSGI the pages skip the stream and the events endpoint answers 204.
+# LocalBackend only reaches clients of the same worker process; use
+# task_manager.events.RedisBackend to fan events out across workers.
+TASK_EVENTS_BACKEND = env("TASK_EVENTS_BACKEND", default="task_manager.events.LocalBackend")
+
+TASK_EVENTS_REDIS_URL = env("TASK_EVENTS_REDIS_URL", default="redis://localhost:6379/0")
+
+# Task change history is buffered per process and written in batches.
+TASK_HISTORY_BUFFER_SIZE = 100
+
+# Seconds before a timer thread writes whatever is buffered; None disables the timer.
+TASK_HISTORY_FLUSH_INTERVAL = 5
+
+# Staff can profile a request with the X-Profile header or ?_profile=1.
+PROFILE_DIR = env('PROFILE_DIR', default=str(BASE_DIR / 'profiles'))
+
+PROFILE_KEEP = 50
+
+# Queries slower than this are logged with their EXPLAIN plan, see `manage.py slow_queries`.
+SLOW_QUERY_THRESHOLD_MS = env.float('SLOW_QUERY_THRESHOLD_MS', default=200)
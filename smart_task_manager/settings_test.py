@@ -0,0 +1,41 @@
+"""
+Settings used by ``manage.py test``.
+
+Nothing has to be set in the environment: the database is in-memory SQLite,
+passwords use a fast hasher and the cache is per process, so the suite also
+runs under ``--parallel``.
+
+Tasks stay on "default", so the schema keeps its foreign key constraints as in a
+single-database deployment. ``settings_test_sharded`` runs the suite again with
+two more task shards.
+"""
+
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("DEBUG", "False")
+os.environ.setdefault("DATABASE_URL", "sqlite://:memory:")
+
+from .settings import *  # noqa: E402,F401,F403
+
+DEBUG = False
+
+DATABASES = {
+    "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+}
+
+TASK_SHARDS = ["default"]
+
+# Hashing with PBKDF2 is deliberately slow; tests log users in constantly.
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# No timer thread writing history behind a test's back; the buffer is flushed
+# when it is full or read.
+TASK_HISTORY_FLUSH_INTERVAL = None
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+# Seeded datasets built once and restored per test class, see tests/snapshots.py
+TEST_SNAPSHOT_DIR = os.environ.get("TEST_SNAPSHOT_DIR", str(BASE_DIR / ".test_snapshots"))  # noqa: F405
@@ -0,0 +1,17 @@
+"""
+``manage.py test --settings=smart_task_manager.settings_test_sharded``
+
+The test settings with three task shards, which drops the foreign key
+constraints from tasks to rows in "default". Tests of sharding are skipped
+under plain ``settings_test``.
+"""
+
+from .settings_test import *  # noqa: F401,F403
+
+DATABASES = {
+    alias: {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}
+    for alias in ("default", "shard1", "shard2")
+}
+
+# Most tests only use "default"; tests of sharding place projects on the others.
+TASK_SHARDS = ["default", "shard1", "shard2"]
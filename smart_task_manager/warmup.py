@@ -0,0 +1,82 @@
+"""
+Warm-up for freshly started application servers.
+
+Resolves every task_manager URL and compiles every project template, so the
+first real requests of a worker don't pay for it. The database step only checks
+that every database answers: connections belong to the thread that opened them,
+so request threads still connect on their first query.
+"""
+
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import URLPattern, get_resolver, resolve, reverse
+
+
+DUMMY_CONVERTER_VALUES = {
+    "IntConverter": 1,
+    "StringConverter": "warmup",
+    "SlugConverter": "warmup",
+    "PathConverter": "warmup",
+}
+
+
+@dataclass
+class WarmupStep:
+    name: str
+    count: int
+    seconds: float
+
+
+def _timed(name, func):
+    start = time.perf_counter()
+    count = func()
+    return WarmupStep(name, count, time.perf_counter() - start)
+
+
+def warm_urls(namespace="task_manager"):
+    resolver = get_resolver()
+    app_resolver = resolver.namespace_dict[namespace][1]
+    count = 0
+    for pattern in app_resolver.url_patterns:
+        if not isinstance(pattern, URLPattern) or not pattern.name:
+            continue
+        kwargs = {
+            key: DUMMY_CONVERTER_VALUES.get(type(converter).__name__, 1)
+            for key, converter in pattern.pattern.converters.items()
+        }
+        resolve(reverse(f"{namespace}:{pattern.name}", kwargs=kwargs))
+        count += 1
+    return count
+
+
+def warm_templates():
+    count = 0
+    for template_dir in settings.TEMPLATES[0]["DIRS"]:
+        template_dir = Path(template_dir)
+        for path in sorted(template_dir.rglob("*.html")):
+            get_template(path.relative_to(template_dir).as_posix())
+            count += 1
+    return count
+
+
+def warm_database():
+    # Connects on the calling thread only; see the module docstring.
+    for connection in connections.all():
+        connection.ensure_connection()
+    return len(connections.all())
+
+
+def warm_up(urls=True, templates=True, database=True):
+    steps = []
+    if urls:
+        steps.append(_timed("urls", warm_urls))
+    if templates:
+        steps.append(_timed("templates", warm_templates))
+    if database:
+        steps.append(_timed("database", warm_database))
+    return steps
@@ -0,0 +1,47 @@
+// Patches task rows in place from the server-sent task events.
+(function () {
+  const container = document.querySelector("[data-task-events]");
+  if (!container || !window.EventSource) {
+    return;
+  }
+  const template = document.getElementById("task-event-row");
+  const source = new EventSource(container.dataset.taskEvents);
+
+  function fill(row, task) {
+    row.dataset.taskId = task.id;
+    row.querySelectorAll("[data-field]").forEach(function (element) {
+      const field = element.dataset.field;
+      if (field === "status" && "is_completed" in task) {
+        element.hidden = !task.is_completed;
+      } else if (field === "pending" && "is_completed" in task) {
+        element.hidden = task.is_completed;
+      } else if (field === "link") {
+        element.href = element.dataset.urlTemplate.replace("0", task.id);
+      } else if (field in task) {
+        element.textContent = task[field];
+      }
+    });
+  }
+
+  source.addEventListener("task", function (message) {
+    const event = JSON.parse(message.data);
+    event.tasks.forEach(function (task) {
+      const action = task.action || event.action;
+      let row = container.querySelector('[data-task-id="' + task.id + '"]');
+      if (action === "deleted" || action === "unassigned") {
+        if (row) {
+          row.remove();
+        }
+        return;
+      }
+      if (!row) {
+        if (!template) {
+          return;
+        }
+        row = template.content.firstElementChild.cloneNode(true);
+        container.prepend(row);
+      }
+      fill(row, task);
+    });
+  });
+})();
@@ -1,5 +1,12 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.options import IS_POPUP_VAR
+from django.contrib.admin.templatetags.admin_urls import add_preserved_filters
 from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import ValidationError
+from django.http import HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import reverse
 
 
 from .models import (Worker,
@@ -8,23 +15,186 @@ from .models import (Worker,
                      Position,
                     Teams,
                     Project,
+                     ArchivedTask,
+                     DeletionJob,
+                     SlowQuery,
+                     RecurringTask,
                      )
+from .archive import restore_archived_task
+from .deletion import schedule_deletion
+from .forms import TaskAdminForm, TaskProjectActionForm, TaskWorkersActionForm
+from . import bulk, history, lookups, sharding
+
+
+class ChunkedDeletionAdminMixin:
+    # Children are removed in batches by a deletion job instead of one big cascade.
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        opts = self.model._meta
+        return [str(obj) for obj in objs], {opts.verbose_name_plural: len(objs)}, set(), []
+
+    def delete_model(self, request, obj):
+        # schedule_deletion() skips objects whose deletion is already under way.
+        if not obj.is_pending_deletion:
+            schedule_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset.filter(is_pending_deletion=False):
+            schedule_deletion(obj)
+
+    def response_delete(self, request, obj_display, obj_id):
+        if IS_POPUP_VAR in request.POST:
+            return super().response_delete(request, obj_display, obj_id)
+        # Not super(): its "deleted successfully" message would be wrong while the job runs.
+        self.message_user(request, f"Deletion of {obj_display} was scheduled, see Deletion jobs for progress.")
+        opts = self.model._meta
+        if self.has_change_permission(request, None):
+            post_url = reverse(
+                f"admin:{opts.app_label}_{opts.model_name}_changelist", current_app=self.admin_site.name
+            )
+            post_url = add_preserved_filters(
+                {"preserved_filters": self.get_preserved_filters(request), "opts": opts}, post_url
+            )
+        else:
+            post_url = reverse("admin:index", current_app=self.admin_site.name)
+        return HttpResponseRedirect(post_url)
 
 
 @admin.register(Worker)
 class WorkerAdmin(UserAdmin):
     list_display = ("username", "email", "position", "team")
+    list_select_related = ("position", "team")
+
+
+def _set_priority_action(priority):
+    def action(modeladmin, request, queryset):
+        updated = bulk.set_priority(queryset, priority, user=request.user)
+        modeladmin.message_user(request, f"Set priority {priority} on {updated} task(s).")
+
+    action.__name__ = f"set_priority_{priority.lower()}"
+    return admin.action(description=f"Set priority to {priority}")(action)
+
+
+class ShardListFilter(admin.SimpleListFilter):
+    """Picks the database shard the task list is read from; TaskAdmin.get_queryset() applies it."""
+    title = "database"
+    parameter_name = "shard"
+
+    @staticmethod
+    def selected(request):
+        shard = request.GET.get(ShardListFilter.parameter_name)
+        return shard if shard in sharding.shards() else sharding.default_shard()
+
+    def lookups(self, request, model_admin):
+        self.current = self.selected(request)
+        return [(alias, alias) for alias in sharding.shards()]
+
+    def has_output(self):
+        return len(self.lookup_choices) > 1
+
+    def choices(self, changelist):
+        for alias, title in self.lookup_choices:
+            yield {
+                "selected": alias == self.current,
+                "query_string": changelist.get_query_string({self.parameter_name: alias}),
+                "display": title,
+            }
+
+    def queryset(self, request, queryset):
+        return queryset
 
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
-    list_display = ("name", "deadline", "priority", "task_type", "project")
+    form = TaskAdminForm
+    list_display = ("name", "deadline", "priority", "type_display", "project_display", "is_completed")
+    # Task types and projects are not on the task shards, so they are never joined.
+    list_select_related = ()
+    list_filter = (ShardListFilter, "is_completed", "priority", "task_type", "project")
     filter_horizontal = ("assignees",)
+    actions = [
+        "mark_completed",
+        *(_set_priority_action(priority) for priority in Task.Priority.values),
+        "move_to_project",
+        "add_assignees",
+        "remove_assignees",
+    ]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).using(ShardListFilter.selected(request))
+
+    def get_object(self, request, object_id, from_field=None):
+        if from_field is None and str(object_id).isdigit():
+            return Task.objects.for_task(object_id).filter(pk=object_id).first()
+        return super().get_object(request, object_id, from_field)
+
+    @admin.display(description="task type", ordering="task_type_id")
+    def type_display(self, obj):
+        return lookups.related(obj, "task_type")
+
+    @admin.display(description="project", ordering="project_id")
+    def project_display(self, obj):
+        return lookups.related(obj, "project")
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            history.record_change(obj, request.user, history.form_changes(form))
+
+    @admin.action(description="Mark selected tasks as completed")
+    def mark_completed(self, request, queryset):
+        updated = bulk.complete_tasks(queryset, user=request.user)
+        self.message_user(request, f"Marked {updated} task(s) as completed.")
+
+    def _action_form(self, request, queryset, form_class, title):
+        """The bound form once submitted and valid; otherwise None and the intermediate page to render."""
+        form = form_class(request.POST if "apply" in request.POST else None)
+        if form.is_valid():
+            return form, None
+        context = {
+            **self.admin_site.each_context(request),
+            "title": title,
+            "opts": self.model._meta,
+            "form": form,
+            "queryset": queryset,
+            "action": request.POST["action"],
+            "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+        }
+        return None, TemplateResponse(request, "admin/task_manager/task/action_form.html", context)
+
+    @admin.action(description="Move selected tasks to a project")
+    def move_to_project(self, request, queryset):
+        form, response = self._action_form(request, queryset, TaskProjectActionForm, "Move tasks to a project")
+        if form is None:
+            return response
+        try:
+            moved = bulk.move_to_project(queryset, form.cleaned_data["project"], user=request.user)
+        except ValidationError as error:
+            self.message_user(request, " ".join(error.messages), messages.ERROR)
+            return None
+        self.message_user(request, f"Moved {moved} task(s).")
+
+    @admin.action(description="Add assignees to selected tasks")
+    def add_assignees(self, request, queryset):
+        form, response = self._action_form(request, queryset, TaskWorkersActionForm, "Add assignees")
+        if form is None:
+            return response
+        added = bulk.add_assignees(queryset, form.cleaned_data["workers"], user=request.user)
+        self.message_user(request, f"Added {added} assignment(s).")
+
+    @admin.action(description="Remove assignees from selected tasks")
+    def remove_assignees(self, request, queryset):
+        form, response = self._action_form(request, queryset, TaskWorkersActionForm, "Remove assignees")
+        if form is None:
+            return response
+        removed = bulk.remove_assignees(queryset, form.cleaned_data["workers"], user=request.user)
+        self.message_user(request, f"Removed {removed} assignment(s).")
 
 
 @admin.register(TaskType)
-class TaskTypeAdmin(admin.ModelAdmin):
-    list_display = ("name",)
+class TaskTypeAdmin(ChunkedDeletionAdminMixin, admin.ModelAdmin):
+    list_display = ("name", "is_pending_deletion")
 
 
 @admin.register(Position)
@@ -33,12 +203,62 @@ class PositionAdmin(admin.ModelAdmin):
 
 
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
-    list_display = ("name", "get_tasks")
+class ProjectAdmin(ChunkedDeletionAdminMixin, admin.ModelAdmin):
+    list_display = ("name", "shard", "get_tasks", "is_pending_deletion")
     readonly_fields = ("get_tasks",)
 
+    def get_readonly_fields(self, request, obj=None):
+        # Changing the shard would not move the project's tasks to the other database.
+        return (*self.readonly_fields, "shard") if obj else self.readonly_fields
+
 
 @admin.register(Teams)
 class TeamsAdmin(admin.ModelAdmin):
     list_display = ("name", "get_workers")
     readonly_fields = ("get_workers",)
+
+
+@admin.register(RecurringTask)
+class RecurringTaskAdmin(admin.ModelAdmin):
+    list_display = ("name", "frequency", "interval", "starts_on", "ends_on", "project", "is_active", "generated_until")
+    list_filter = ("frequency", "is_active", "project")
+    filter_horizontal = ("assignees",)
+
+    def save_model(self, request, obj, form, change):
+        # A changed schedule is generated again from today; existing occurrences are kept.
+        obj.generated_until = None
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(ArchivedTask)
+class ArchivedTaskAdmin(admin.ModelAdmin):
+    list_display = ("name", "deadline", "priority", "task_type", "project", "archived_at")
+    filter_horizontal = ("assignees",)
+    actions = ("restore_tasks",)
+
+    @admin.action(description="Restore selected tasks")
+    def restore_tasks(self, request, queryset):
+        for archived in queryset:
+            restore_archived_task(archived)
+        self.message_user(request, f"Restored {len(queryset)} task(s).")
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "status", "progress", "processed", "total", "created_at", "finished_at")
+    list_filter = ("status", "target")
+    readonly_fields = [field.name for field in DeletionJob._meta.fields] + ["progress"]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ("view_name", "sql", "calls", "total_ms", "max_ms", "last_seen")
+    list_filter = ("view_name",)
+    search_fields = ("sql",)
+    readonly_fields = [field.name for field in SlowQuery._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
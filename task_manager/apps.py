@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class TaskManagerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'task_manager'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        from .search import create_trigram_indexes
+        from .sharding import reserve_task_ids
+
+        post_migrate.connect(create_trigram_indexes, sender=self, dispatch_uid="task_manager_trigram_indexes")
+        post_migrate.connect(reserve_task_ids, sender=self, dispatch_uid="task_manager_reserve_task_ids")
@@ -0,0 +1,61 @@
+from django.db import transaction
+
+from . import bulk, sharding
+from .models import Task, ArchivedTask
+
+
+ARCHIVE_BATCH_SIZE = 500
+
+ARCHIVED_FIELDS = ("name", "description", "deadline", "is_completed", "priority", "task_type_id", "project_id")
+
+
+def archive_completed_tasks(before, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move completed tasks with a deadline before ``before`` into the archive tables."""
+    return sum(_archive_shard(alias, before, batch_size) for alias in sharding.shards())
+
+
+def _archive_shard(using, before, batch_size):
+    # The archive tables are on "default". Its transaction commits before the shard's
+    # deletes, and a batch archived twice after a failed shard commit is skipped.
+    archived = 0
+    while True:
+        with transaction.atomic(using=using), transaction.atomic():
+            batch = list(
+                Task.objects.using(using).filter(is_completed=True, deadline__lt=before)
+                .order_by("pk")
+                .only("pk", *ARCHIVED_FIELDS)[:batch_size]
+            )
+            if not batch:
+                break
+            ids = [task.pk for task in batch]
+            links = Task.assignees.through.objects.using(using).filter(task_id__in=ids).values_list("task_id", "worker_id")
+
+            ArchivedTask.objects.bulk_create([
+                ArchivedTask(id=task.pk, **{field: getattr(task, field) for field in ARCHIVED_FIELDS})
+                for task in batch
+            ], ignore_conflicts=True)
+            ArchivedTask.assignees.through.objects.bulk_create([
+                ArchivedTask.assignees.through(archivedtask_id=task_id, worker_id=worker_id)
+                for task_id, worker_id in links
+            ], ignore_conflicts=True)
+            bulk.delete_tasks(ids)
+        archived += len(batch)
+        if len(batch) < batch_size:
+            break
+    return archived
+
+
+def restore_archived_task(archived):
+    """Move an archived task back into the live table, keeping its id and assignees."""
+    # The id encodes the shard the task was archived from.
+    using = sharding.task_shard(archived.pk)
+    with transaction.atomic(using=using), transaction.atomic():
+        task = Task.objects.create(id=archived.pk, **{field: getattr(archived, field) for field in ARCHIVED_FIELDS})
+        worker_ids = ArchivedTask.assignees.through.objects.filter(
+            archivedtask_id=archived.pk
+        ).values_list("worker_id", flat=True)
+        Task.assignees.through.objects.using(using).bulk_create([
+            Task.assignees.through(task_id=task.pk, worker_id=worker_id) for worker_id in worker_ids
+        ])
+        archived.delete()
+    return task
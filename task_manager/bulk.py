@@ -0,0 +1,163 @@
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from . import caching, dependencies, events, history, sharding
+from .models import Task, TaskDependency
+
+
+Assignment = Task.assignees.through
+
+
+def _payloads(ids, unassigned=(), using=None):
+    assignees = defaultdict(list)
+    links = Assignment.objects.using(using).filter(task_id__in=ids)
+    for task_id, worker_id in links.values_list("task_id", "worker_id"):
+        assignees[task_id].append(worker_id)
+    return [
+        {
+            "id": task["pk"],
+            "name": task["name"],
+            "priority": task["priority"],
+            "deadline": str(task["deadline"]),
+            "is_completed": task["is_completed"],
+            "project": task["project_id"],
+            "assignees": assignees[task["pk"]],
+            **({"unassigned": list(unassigned)} if unassigned else {}),
+        }
+        for task in Task.objects.using(using).filter(pk__in=ids).values(
+            "pk", "name", "priority", "deadline", "is_completed", "project_id"
+        )
+    ]
+
+
+def _publish(action, ids, unassigned=(), using=None):
+    if not ids:
+        return
+    # Queryset updates send no signals, so cached lists are invalidated here.
+    caching.invalidate_on_commit("tasks", using=using)
+    # One event for the whole batch, built after commit with two queries.
+    events.publish(action, lambda: _payloads(ids, unassigned, using), using=using)
+
+
+def _tasks(tasks, using):
+    # Actions take task ids, or a filtered queryset that the UPDATE runs on directly.
+    if isinstance(tasks, QuerySet):
+        return tasks
+    return Task.objects.using(using).filter(pk__in=tasks)
+
+
+def _task_ids(tasks):
+    # For filtering the assignee links: a subquery rather than reading every id.
+    return tasks.values("pk") if isinstance(tasks, QuerySet) else tasks
+
+
+def _field_changes(tasks, field, new):
+    # The history diff of setting ``field`` to ``new``, read before the update.
+    return {
+        pk: {field: [old, new]}
+        for pk, old in tasks.exclude(**{field: new}).order_by().values_list("pk", field)
+    }
+
+
+def _assignee_changes(links, key):
+    changes = defaultdict(lambda: {"assignees": {"added": [], "removed": []}})
+    for task_id, worker_id in sorted(links):
+        changes[task_id]["assignees"][key].append(worker_id)
+    return changes
+
+
+# The ``tasks`` of each action are a list of ids or a task queryset, see per_shard().
+# Events, history and critical path invalidation cover the tasks that changed.
+
+@sharding.per_shard
+def complete_tasks(tasks, user=None, using=None):
+    tasks = _tasks(tasks, using)
+    changes = _field_changes(tasks, "is_completed", True)
+    history.record_changes(changes, user, using=using)
+    updated = tasks.update(is_completed=True, updated_at=timezone.now())
+    dependencies.invalidate_task_projects(list(changes), using=using)
+    _publish("completed", list(changes), using=using)
+    return updated
+
+
+@sharding.per_shard
+def set_priority(tasks, priority, user=None, using=None):
+    tasks = _tasks(tasks, using)
+    changes = _field_changes(tasks, "priority", priority)
+    history.record_changes(changes, user, using=using)
+    updated = tasks.update(priority=priority, updated_at=timezone.now())
+    _publish("updated", list(changes), using=using)
+    return updated
+
+
+def move_to_project(tasks, project, user=None):
+    # Moving rows between databases is a data migration, not a bulk edit.
+    target = sharding.project_shard(project.pk if project else None)
+    if isinstance(tasks, (QuerySet, sharding.MergedTasks)):
+        elsewhere = any(qs.db != target and qs.exists() for qs in sharding.shard_querysets(tasks))
+    else:
+        elsewhere = any(alias != target for alias in sharding.group_task_ids(tasks))
+    if elsewhere:
+        raise ValidationError("Tasks can only be moved to a project on the same database shard.", code="shard")
+    return _move_to_project(tasks, project, user=user)
+
+
+@sharding.per_shard
+def _move_to_project(tasks, project, user=None, using=None):
+    tasks = _tasks(tasks, using)
+    changes = _field_changes(tasks, "project", project.pk if project else None)
+    history.record_changes(changes, user, using=using)
+    moved_from = {old for change in changes.values() for old, _ in change.values()}
+    dependencies.invalidate_projects([*moved_from, project.pk if project else None], using=using)
+    updated = tasks.update(project=project, updated_at=timezone.now())
+    _publish("updated", list(changes), using=using)
+    return updated
+
+
+@sharding.per_shard
+def add_assignees(tasks, workers, user=None, using=None):
+    # Each new link is a row of its own, so this action needs the ids of the tasks.
+    ids = list(tasks.values_list("pk", flat=True)) if isinstance(tasks, QuerySet) else tasks
+    links = Assignment.objects.using(using)
+    existing = set(links.filter(task_id__in=ids, worker_id__in=[worker.pk for worker in workers])
+                   .values_list("task_id", "worker_id"))
+    added = {(task_id, worker.pk) for task_id in ids for worker in workers} - existing
+    links.bulk_create(
+        [Assignment(task_id=task_id, worker_id=worker_id) for task_id, worker_id in sorted(added)],
+        ignore_conflicts=True,
+    )
+    history.record_changes(_assignee_changes(added, "added"), user, using=using)
+    _publish("updated", sorted({task_id for task_id, _ in added}), using=using)
+    return len(added)
+
+
+@sharding.per_shard
+def remove_assignees(tasks, workers, user=None, using=None):
+    worker_ids = [worker.pk for worker in workers]
+    links = Assignment.objects.using(using).filter(task_id__in=_task_ids(tasks), worker_id__in=worker_ids)
+    removed = set(links.values_list("task_id", "worker_id"))
+    deleted, _ = links.delete()
+    history.record_changes(_assignee_changes(removed, "removed"), user, using=using)
+    _publish("updated", sorted({task_id for task_id, _ in removed}), unassigned=worker_ids, using=using)
+    return deleted
+
+
+@sharding.per_shard
+def delete_tasks(ids, using=None):
+    """Delete tasks with one statement per table and one "deleted" event.
+
+    The rows are removed without loading them, so the per-row delete receivers
+    (one assignee query and one event per task) are skipped.
+    """
+    payloads = _payloads(ids, using=using)
+    Assignment.objects.using(using).filter(task_id__in=ids)._raw_delete(using)
+    TaskDependency.objects.using(using).filter(Q(task_id__in=ids) | Q(blocked_by_id__in=ids))._raw_delete(using)
+    deleted = Task.objects.using(using).filter(pk__in=ids)._raw_delete(using)
+    caching.invalidate_on_commit("tasks", using=using)
+    dependencies.invalidate_projects({payload["project"] for payload in payloads}, using=using)
+    if payloads:
+        events.publish("deleted", payloads, using=using)
+    return deleted
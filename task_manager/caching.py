@@ -0,0 +1,124 @@
+"""
+Stampede-safe caching of expensive values in the shared Django cache.
+
+Each entry remembers how long it took to compute and the generation of every
+namespace it depends on; ``invalidate()`` bumps a namespace generation instead of
+deleting keys. When an entry is out of date only one process recomputes it, holding
+a short lock taken with ``cache.add``, while the others keep serving the previous
+value. Entries are also refreshed a little before they expire, earlier the longer
+they take to compute (probabilistic early expiration, "XFetch"), so popular keys
+rarely expire for everyone at once.
+"""
+
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+ENTRY_KEY = "caching:entry:{}"
+LOCK_KEY = "caching:lock:{}"
+GENERATION_KEY = "caching:generation:{}"
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+@dataclass
+class CacheEntry:
+    value: object
+    delta: float
+    expires: float
+    generations: tuple
+
+
+def generations(namespaces):
+    keys = [GENERATION_KEY.format(namespace) for namespace in namespaces]
+    found = cache.get_many(keys) if keys else {}
+    return tuple(found.get(key, 0) for key in keys)
+
+
+def invalidate(*namespaces):
+    for namespace in namespaces:
+        key = GENERATION_KEY.format(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, 1, None):
+                cache.incr(key)
+
+
+def invalidate_on_commit(*namespaces, using=None):
+    # Immediately for this process, and again once other processes can see the change
+    # made on the ``using`` database.
+    invalidate(*namespaces)
+    transaction.on_commit(lambda: invalidate(*namespaces), using=using)
+
+
+def _acquire(key, timeout):
+    token = uuid.uuid4().hex
+    return token if cache.add(LOCK_KEY.format(key), token, timeout) else None
+
+
+def _release(key, token):
+    if cache.get(LOCK_KEY.format(key)) == token:
+        cache.delete(LOCK_KEY.format(key))
+
+
+def _expired_early(entry, beta):
+    # -log(u) is exponentially distributed, so early refreshes stay rare until close to expiry.
+    return time.time() - entry.delta * beta * math.log(1.0 - random.random()) >= entry.expires
+
+
+def _is_current(entry, current):
+    return entry is not None and entry.generations == current and entry.expires > time.time()
+
+
+def get_or_compute(key, compute, namespaces=(), timeout=None, stale_timeout=None, beta=1.0):
+    """Return the cached value for ``key``, calling ``compute()`` in at most one process when it is out of date.
+
+    ``timeout`` is how long a value is fresh; after that it may still be served for
+    ``stale_timeout`` seconds while another request refreshes it.
+    """
+    timeout = timeout if timeout is not None else getattr(settings, "CACHING_TIMEOUT", 60)
+    stale_timeout = stale_timeout if stale_timeout is not None else getattr(settings, "CACHING_STALE_TIMEOUT", 300)
+    lock_timeout = getattr(settings, "CACHING_LOCK_TIMEOUT", 10)
+    entry_key = ENTRY_KEY.format(key)
+
+    current = generations(namespaces)
+    entry = cache.get(entry_key)
+    if entry is not None and entry.generations == current and not _expired_early(entry, beta):
+        return entry.value
+
+    seen = entry
+    token = _acquire(key, lock_timeout)
+    if token is None and entry is not None:
+        return entry.value
+
+    # Nothing to serve yet: wait for the process holding the lock to store a value.
+    deadline = time.monotonic() + lock_timeout
+    while token is None:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(entry_key)
+        if entry is not None:
+            return entry.value
+        if time.monotonic() >= deadline:
+            return compute()
+        token = _acquire(key, lock_timeout)
+
+    try:
+        # Another process may have refreshed the entry between our read and the lock.
+        entry = cache.get(entry_key)
+        if _is_current(entry, generations(namespaces)) and (seen is None or entry.expires != seen.expires):
+            return entry.value
+        started = time.monotonic()
+        value = compute()
+        delta = time.monotonic() - started
+        cache.set(entry_key, CacheEntry(value, delta, time.time() + timeout, current), timeout + stale_timeout)
+        return value
+    finally:
+        _release(key, token)
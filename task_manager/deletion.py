@@ -0,0 +1,110 @@
+import threading
+from datetime import timedelta
+
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import bulk, caching, lookups, sharding
+from .models import ArchivedTask, DeletionJob, Project, Task, TaskType
+
+
+DELETION_BATCH_SIZE = 500
+
+# A running job without a finished batch for this long is taken to be interrupted.
+DELETION_STALE_AFTER = timedelta(minutes=10)
+
+TARGET_MODELS = {
+    DeletionJob.Target.TASK_TYPE: TaskType,
+    DeletionJob.Target.PROJECT: Project,
+}
+
+
+def _children(job):
+    # Each entry is a queryset of child rows and whether they are deleted or detached.
+    # Tasks on other shards have no foreign key constraint to stop the parent's deletion.
+    if job.target == DeletionJob.Target.TASK_TYPE:
+        return [
+            *((Task.objects.using(alias).filter(task_type_id=job.target_id), True) for alias in sharding.shards()),
+            (ArchivedTask.objects.filter(task_type_id=job.target_id), True),
+        ]
+    return [
+        *((Task.objects.using(alias).filter(project_id=job.target_id), False) for alias in sharding.shards()),
+        (ArchivedTask.objects.filter(project_id=job.target_id), False),
+    ]
+
+
+def schedule_deletion(obj):
+    """Mark ``obj`` as pending deletion and start removing its children in the background.
+
+    Returns None when ``obj`` is already pending deletion, so it never gets a second job.
+    """
+    target = DeletionJob.Target.TASK_TYPE if isinstance(obj, TaskType) else DeletionJob.Target.PROJECT
+    with transaction.atomic():
+        if not type(obj).objects.filter(pk=obj.pk, is_pending_deletion=False).update(is_pending_deletion=True):
+            return None
+        lookups.invalidate(type(obj))
+        if target == DeletionJob.Target.PROJECT:
+            caching.invalidate_on_commit("projects")
+        job = DeletionJob(target=target, target_id=obj.pk, target_name=obj.name)
+        job.total = sum(children.count() for children, _ in _children(job))
+        job.save()
+        transaction.on_commit(lambda: lookups.invalidate(type(obj)))
+        transaction.on_commit(lambda: start_deletion_job(job.pk))
+    return job
+
+
+def start_deletion_job(job_id):
+    threading.Thread(target=_run_in_thread, args=(job_id,), daemon=True).start()
+
+
+def _run_in_thread(job_id):
+    close_old_connections()
+    try:
+        run_deletion_job(DeletionJob.objects.get(pk=job_id))
+    finally:
+        connections.close_all()
+
+
+def claim_deletion_job(job, stale_after=DELETION_STALE_AFTER):
+    """Mark ``job`` running unless another worker is; a single conditional UPDATE decides."""
+    now = timezone.now()
+    claimable = Q(status=DeletionJob.Status.PENDING) | Q(
+        Q(heartbeat_at__isnull=True) | Q(heartbeat_at__lt=now - stale_after), status=DeletionJob.Status.RUNNING
+    )
+    return bool(
+        DeletionJob.objects.filter(claimable, pk=job.pk).update(status=DeletionJob.Status.RUNNING, heartbeat_at=now)
+    )
+
+
+def run_deletion_job(job, batch_size=DELETION_BATCH_SIZE, stale_after=DELETION_STALE_AFTER):
+    """Run ``job`` to completion, or return None if another worker holds it."""
+    if not claim_deletion_job(job, stale_after):
+        return None
+    try:
+        for children, delete in _children(job):
+            while True:
+                with transaction.atomic(using=children.db):
+                    ids = list(children.order_by("pk").values_list("pk", flat=True)[:batch_size])
+                    if not ids:
+                        break
+                    batch = children.filter(pk__in=ids)
+                    if delete and children.model is Task:
+                        bulk.delete_tasks(ids)
+                    elif delete:
+                        batch.delete()
+                    else:
+                        batch.update(project=None, updated_at=timezone.now())
+                        caching.invalidate_on_commit("tasks", using=children.db)
+                    DeletionJob.objects.filter(pk=job.pk).update(
+                        processed=F("processed") + len(ids), heartbeat_at=timezone.now()
+                    )
+        TARGET_MODELS[job.target].objects.filter(pk=job.target_id).delete()
+    except Exception as exc:
+        DeletionJob.objects.filter(pk=job.pk).update(
+            status=DeletionJob.Status.FAILED, error=str(exc), finished_at=timezone.now()
+        )
+        raise
+    DeletionJob.objects.filter(pk=job.pk).update(status=DeletionJob.Status.DONE, finished_at=timezone.now())
+    job.refresh_from_db()
+    return job
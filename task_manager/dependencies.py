@@ -0,0 +1,181 @@
+"""
+Blocked-by relations between tasks and the critical path of each project.
+
+Transitive closures are read with one recursive CTE rather than by walking
+querysets. A project's critical path is computed from its open tasks and the
+edges between them and cached per project; edge changes, task saves and bulk
+actions bump only the affected projects' cache generations.
+"""
+
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.db import connections, transaction
+
+from . import caching, sharding
+from .models import Task, TaskDependency
+
+
+CLOSURE_DEPTH_LIMIT = 1000
+
+
+def _closure_sql(connection, direction):
+    table = connection.ops.quote_name(TaskDependency._meta.db_table)
+    start, step = ("task_id", "blocked_by_id") if direction == "up" else ("blocked_by_id", "task_id")
+    return f"""
+        WITH RECURSIVE closure(id, depth) AS (
+            SELECT {step}, 1 FROM {table} WHERE {start} = %s
+            UNION
+            SELECT d.{step}, c.depth + 1 FROM {table} d JOIN closure c ON d.{start} = c.id
+            WHERE c.depth < %s
+        )
+        SELECT id, MIN(depth) FROM closure GROUP BY id
+    """
+
+
+def closure(task_id, direction="up"):
+    """Map every task transitively blocking (``up``) or blocked by (``down``) ``task_id`` to its distance."""
+    connection = connections[sharding.task_shard(task_id)]
+    with connection.cursor() as cursor:
+        cursor.execute(_closure_sql(connection, direction), [task_id, CLOSURE_DEPTH_LIMIT])
+        return dict(cursor.fetchall())
+
+
+def blockers(task_id):
+    return closure(task_id, "up")
+
+
+def dependents(task_id):
+    return closure(task_id, "down")
+
+
+def check_dependency(task, blocked_by):
+    if task.pk == blocked_by.pk:
+        raise ValidationError("A task cannot block itself.", code="self")
+    if sharding.task_shard(task.pk) != sharding.task_shard(blocked_by.pk):
+        raise ValidationError("Tasks on different database shards cannot block each other.", code="shard")
+    if task.pk in blockers(blocked_by.pk):
+        raise ValidationError(
+            f"{blocked_by.name} already waits for {task.name}, so this would create a cycle.", code="cycle"
+        )
+
+
+def add_dependency(task, blocked_by):
+    using = sharding.task_shard(task.pk)
+    with transaction.atomic(using=using):
+        # Two inserts closing a cycle through the same pair of tasks are serialized.
+        list(Task.objects.using(using).select_for_update().filter(pk__in=[task.pk, blocked_by.pk]).values_list("pk"))
+        check_dependency(task, blocked_by)
+        dependency, _ = TaskDependency.objects.using(using).get_or_create(task=task, blocked_by=blocked_by)
+    return dependency
+
+
+def remove_dependency(task, blocked_by):
+    links = TaskDependency.objects.using(sharding.task_shard(task.pk))
+    for dependency in links.filter(task=task, blocked_by=blocked_by):
+        dependency.delete()
+
+
+def namespace(project_id):
+    return f"critical-path:{project_id}"
+
+
+def invalidate_projects(project_ids, using=None):
+    namespaces = {namespace(project_id) for project_id in project_ids if project_id is not None}
+    if namespaces:
+        caching.invalidate_on_commit(*namespaces, using=using)
+
+
+def invalidate_task_projects(task_ids, using=None):
+    """Invalidate the projects ``task_ids`` belong to once the transaction on ``using`` commits."""
+    def invalidate():
+        project_ids = {
+            project_id
+            for alias, ids in sharding.group_task_ids(task_ids).items()
+            for project_id in Task.objects.using(alias).filter(pk__in=ids)
+            .order_by().values_list("project_id", flat=True).distinct()
+        }
+        caching.invalidate(*{namespace(project_id) for project_id in project_ids if project_id is not None})
+
+    transaction.on_commit(invalidate, using=using)
+
+
+@dataclass
+class PathStep:
+    id: int
+    name: str
+    deadline: date
+    earliest_finish: date
+
+    @property
+    def is_late(self):
+        return self.earliest_finish > self.deadline
+
+
+@dataclass
+class CriticalPath:
+    finish: date = None
+    steps: list = field(default_factory=list)
+    late: list = field(default_factory=list)
+
+
+def compute_critical_path(project_id):
+    """Earliest finish of every open task in the project and the chain of blockers that sets the latest one.
+
+    A task can't finish before its own deadline or before any of its blockers, so
+    the critical path is the chain of blockers behind the task that finishes last.
+    Blockers outside the project are not part of the computation.
+    """
+    tasks = {
+        pk: (name, deadline)
+        for pk, name, deadline in Task.objects.for_project(project_id).filter(is_completed=False)
+        .order_by().values_list("pk", "name", "deadline")
+    }
+    edges = TaskDependency.objects.using(sharding.project_shard(project_id)).filter(
+        task__project_id=project_id, task__is_completed=False,
+        blocked_by__project_id=project_id, blocked_by__is_completed=False,
+    ).values_list("task_id", "blocked_by_id")
+
+    parents = defaultdict(list)
+    children = defaultdict(list)
+    waiting = dict.fromkeys(tasks, 0)
+    for task_id, blocker_id in edges:
+        parents[task_id].append(blocker_id)
+        children[blocker_id].append(task_id)
+        waiting[task_id] += 1
+
+    finish, gate, depth = {}, {}, {}
+    ready = deque(pk for pk, count in waiting.items() if count == 0)
+    while ready:
+        pk = ready.popleft()
+        finish[pk], depth[pk] = tasks[pk][1], 0
+        for parent in parents[pk]:
+            if (finish[parent], depth[parent] + 1) > (finish[pk], depth[pk]) and finish[parent] >= tasks[pk][1]:
+                finish[pk], gate[pk], depth[pk] = finish[parent], parent, depth[parent] + 1
+        for child in children[pk]:
+            waiting[child] -= 1
+            if not waiting[child]:
+                ready.append(child)
+
+    def step(pk):
+        name, deadline = tasks[pk]
+        return PathStep(pk, name, deadline, finish[pk])
+
+    if not finish:
+        return CriticalPath()
+    end = max(finish, key=lambda pk: (finish[pk], depth[pk], -pk))
+    path = [end]
+    while path[-1] in gate:
+        path.append(gate[path[-1]])
+    late = sorted((pk for pk in finish if finish[pk] > tasks[pk][1]), key=lambda pk: (tasks[pk][1], pk))
+    return CriticalPath(finish[end], [step(pk) for pk in reversed(path)], [step(pk) for pk in late])
+
+
+def critical_path(project_id):
+    return caching.get_or_compute(
+        f"critical-path:{project_id}",
+        lambda: compute_critical_path(project_id),
+        namespaces=(namespace(project_id),),
+    )
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+DEFAULT_BACKEND = "task_manager.events.LocalBackend"
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class LocalSubscription:
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def deliver(self, event):
+        if self.queue.full():
+            # A slow client loses its oldest event rather than blocking publishers.
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    async def close(self):
+        self.backend.unsubscribe(self)
+
+
+class LocalBackend:
+    """In-process pub/sub: events reach subscribers of the current worker only."""
+
+    def __init__(self, **options):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's event loop has already been closed.
+                self.unsubscribe(subscription)
+
+    def subscribe(self):
+        subscription = LocalSubscription(self)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+
+class RedisSubscription:
+
+    def __init__(self, client, channel):
+        self.pubsub = client.pubsub(ignore_subscribe_messages=True)
+        self.channel = channel
+        self.subscribed = False
+
+    async def get(self):
+        if not self.subscribed:
+            await self.pubsub.subscribe(self.channel)
+            self.subscribed = True
+        while True:
+            message = await self.pubsub.get_message(timeout=None)
+            if message is not None:
+                return json.loads(message["data"])
+
+    async def close(self):
+        await self.pubsub.aclose()
+
+
+class RedisBackend:
+    """Fans events out to every worker through a Redis channel."""
+
+    def __init__(self, url=None, channel="task-events", **options):
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError as exc:
+            raise ImproperlyConfigured("RedisBackend requires the 'redis' package.") from exc
+        self.url = url or settings.TASK_EVENTS_REDIS_URL
+        self.channel = channel
+        self.client = redis.Redis.from_url(self.url)
+        self.async_client = redis.asyncio.Redis.from_url(self.url)
+
+    def publish(self, event):
+        self.client.publish(self.channel, json.dumps(event))
+
+    def subscribe(self):
+        return RedisSubscription(self.async_client, self.channel)
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        backend_class = import_string(getattr(settings, "TASK_EVENTS_BACKEND", DEFAULT_BACKEND))
+        _backend = backend_class(**getattr(settings, "TASK_EVENTS_OPTIONS", {}))
+    return _backend
+
+
+def _reset_backend(setting, **kwargs):
+    global _backend
+    if setting in ("TASK_EVENTS_BACKEND", "TASK_EVENTS_OPTIONS"):
+        _backend = None
+
+
+setting_changed.connect(_reset_backend)
+
+
+def task_payload(task, assignee_ids, unassigned=()):
+    payload = {
+        "id": task.pk,
+        "name": task.name,
+        "priority": task.priority,
+        "deadline": str(task.deadline) if task.deadline else None,
+        "is_completed": task.is_completed,
+        "project": task.project_id,
+        "assignees": list(assignee_ids),
+    }
+    if unassigned:
+        payload["unassigned"] = list(unassigned)
+    return payload
+
+
+def publish(action, tasks, using=None):
+    """Publish one event once the transaction on ``using`` commits.
+
+    ``tasks`` is a list of payloads, or a callable returning one when the payloads
+    can only be built after commit (e.g. assignees saved after the task row).
+    """
+    def send():
+        get_backend().publish({"action": action, "tasks": tasks() if callable(tasks) else tasks})
+
+    transaction.on_commit(send, using=using)
+
+
+def streaming_supported(request):
+    # Under WSGI an endless stream holds a worker thread and is never flushed to the client.
+    return isinstance(request, ASGIRequest)
+
+
+def _followed_task(task, user_id, project_id):
+    if project_id is not None and task.get("project") != project_id:
+        return None
+    if user_id is None or user_id in task.get("assignees", ()):
+        return task
+    if user_id in task.get("unassigned", ()):
+        # The subscriber was removed from the task, so it leaves their list.
+        return {**task, "action": "unassigned"}
+    return None
+
+
+def event_matches(event, user_id=None, project_id=None):
+    """Keep only the tasks in ``event`` that the subscriber is following."""
+    tasks = [
+        followed for followed in (_followed_task(task, user_id, project_id) for task in event["tasks"])
+        if followed is not None
+    ]
+    return {**event, "tasks": tasks} if tasks else None
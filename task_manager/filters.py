@@ -0,0 +1,142 @@
+from collections import defaultdict
+from itertools import chain
+from datetime import date
+from urllib.parse import urlencode
+
+from django.db.models import BooleanField, Case, Count, Q, Value, When
+
+from . import sharding
+from .models import Project, Task, TaskType
+
+
+FACETS = {
+    "priority": "Priority",
+    "task_type": "Type",
+    "project": "Project",
+    "status": "Status",
+    "overdue": "Overdue",
+}
+
+STATUS_LABELS = {"open": "Open", "completed": "Completed"}
+
+OVERDUE_LABELS = {"1": "Overdue", "0": "On time"}
+
+
+class TaskFacets:
+    """Facet filters for task lists, with every option count taken from one grouped query."""
+
+    def __init__(self, params, queryset):
+        self.params = params
+        self.queryset = queryset
+        self.today = date.today()
+        self.selected = {facet: params[facet] for facet in FACETS if params.get(facet)}
+
+    def _condition(self, facet, value):
+        if facet == "priority":
+            return Q(priority=value)
+        if facet in ("task_type", "project"):
+            if value == "none":
+                return Q(**{f"{facet}__isnull": True})
+            return Q(**{f"{facet}_id": int(value)}) if value.isdigit() else Q(pk__in=[])
+        if facet == "status":
+            return Q(is_completed=value == "completed")
+        overdue = Q(is_completed=False, deadline__lt=self.today)
+        return overdue if value == "1" else ~overdue
+
+    def filter(self):
+        return self.queryset.filter(
+            *(self._condition(facet, value) for facet, value in self.selected.items())
+        )
+
+    def _group(self, queryset):
+        return list(
+            queryset.order_by()
+            .annotate(
+                is_overdue=Case(
+                    When(is_completed=False, deadline__lt=self.today, then=Value(True)),
+                    default=Value(False),
+                    output_field=BooleanField(),
+                )
+            )
+            .values("priority", "task_type_id", "project_id", "is_completed", "is_overdue")
+            .annotate(total=Count("pk"))
+        )
+
+    def _grouped_rows(self):
+        # One grouped query per shard holding tasks, run concurrently.
+        querysets = sharding.shard_querysets(sharding.across_shards(self.queryset))
+        for row in chain.from_iterable(sharding.fan_out(self._group, querysets)):
+            yield {
+                "priority": row["priority"],
+                "task_type": str(row["task_type_id"]),
+                "project": str(row["project_id"]) if row["project_id"] else "none",
+                "status": "completed" if row["is_completed"] else "open",
+                "overdue": "1" if row["is_overdue"] else "0",
+            }, row["total"]
+
+    def counts(self):
+        # Each facet counts the rows matching every *other* selected facet, so
+        # options of an already filtered facet still show what switching would give.
+        counts = {facet: defaultdict(int) for facet in FACETS}
+        for values, total in self._grouped_rows():
+            for facet in FACETS:
+                if all(values[other] == value for other, value in self.selected.items() if other != facet):
+                    counts[facet][values[facet]] += total
+        return counts
+
+    def _labels(self, counts):
+        type_ids = [int(value) for value in counts["task_type"] if value.isdigit()]
+        project_ids = [int(value) for value in counts["project"] if value.isdigit()]
+        return {
+            "priority": dict(Task.Priority.choices),
+            "task_type": {str(pk): name for pk, name in TaskType.objects.filter(pk__in=type_ids).values_list("pk", "name")},
+            "project": {
+                "none": "No project",
+                **{str(pk): name for pk, name in Project.objects.filter(pk__in=project_ids).values_list("pk", "name")},
+            },
+            "status": STATUS_LABELS,
+            "overdue": OVERDUE_LABELS,
+        }
+
+    def _query(self, facet, value):
+        params = self.params.copy()
+        params.pop("page", None)
+        if value is None:
+            params.pop(facet, None)
+        else:
+            params[facet] = value
+        return params.urlencode()
+
+    def cache_key(self):
+        return f"{self.today}:{urlencode(sorted(self.selected.items()))}"
+
+    def options(self, counts=None):
+        counts = self.counts() if counts is None else counts
+        labels = self._labels(counts)
+        facets = []
+        for facet, title in FACETS.items():
+            selected = self.selected.get(facet)
+            values = list(labels[facet]) if facet in ("priority", "status", "overdue") else sorted(
+                counts[facet], key=lambda value: labels[facet].get(value, value)
+            )
+            facets.append({
+                "name": facet,
+                "title": title,
+                "clear_query": self._query(facet, None) if selected else None,
+                "options": [
+                    {
+                        "value": value,
+                        "label": labels[facet].get(value, value),
+                        "count": counts[facet].get(value, 0),
+                        "selected": value == selected,
+                        "query": self._query(facet, None if value == selected else value),
+                    }
+                    for value in values
+                ],
+            })
+        return facets
+
+    def query_without_page(self):
+        params = self.params.copy()
+        params.pop("page", None)
+        return params.urlencode()
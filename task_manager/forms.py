@@ -1,8 +1,88 @@
 from django import forms
-from .models import Task
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, models
+from django.forms.models import ModelChoiceIterator
 
+from . import dependencies, lookups, sharding
+from .models import Project, Task, Worker
 
-class TaskCreateForm(forms.ModelForm):
+
+class CachedModelChoiceIterator(ModelChoiceIterator):
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self.field.cached_objects():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.cached_objects()) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.cached_objects())
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """Choice field for a lookup table, served from the process-local lookup cache.
+
+    Objects pending deletion are never offered.
+    """
+    iterator = CachedModelChoiceIterator
+
+    def cached_objects(self):
+        return [
+            obj for obj in lookups.all_objects(self.queryset.model)
+            if not getattr(obj, "is_pending_deletion", False)
+        ]
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, self.queryset.model):
+            value = value.pk
+        try:
+            pk = int(value)
+        except (TypeError, ValueError):
+            pk = obj = None
+        else:
+            # Created by another process since our last version check: fall back to a query.
+            obj = lookups.get(self.queryset.model, pk) or self.queryset.filter(pk=pk).first()
+        if obj is None or getattr(obj, "is_pending_deletion", False):
+            raise ValidationError(
+                self.error_messages["invalid_choice"],
+                code="invalid_choice",
+                params={"value": value},
+            )
+        return obj
+
+
+class TaskAssigneesMixin:
+    """Reads and saves assignees by id for tasks on a shard, where links and workers can't be joined."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk and self.instance._state.db != DEFAULT_DB_ALIAS:
+            self.initial["assignees"] = self.instance.assignee_ids()
+
+    def _save_m2m(self):
+        if self.instance._state.db == DEFAULT_DB_ALIAS:
+            return super()._save_m2m()
+        self.instance.set_assignees(self.cleaned_data["assignees"])
+
+
+class TaskAdminForm(TaskAssigneesMixin, forms.ModelForm):
+    class Meta:
+        model = Task
+        fields = "__all__"
+
+    def clean_project(self):
+        project = self.cleaned_data["project"]
+        if self.instance.pk and sharding.project_shard(project.pk if project else None) != self.instance._state.db:
+            raise ValidationError("Tasks can only be moved to a project on the same database shard.", code="shard")
+        return project
+
+
+class TaskCreateForm(TaskAssigneesMixin, forms.ModelForm):
     class Meta:
         model = Task
         fields = [
@@ -18,9 +98,10 @@ class TaskCreateForm(forms.ModelForm):
             "deadline": forms.DateInput(attrs={"type": "date"}),
             "assignees": forms.SelectMultiple(attrs={"size": 5}),
         }
+        field_classes = {"task_type": CachedModelChoiceField}
 
 
-class TaskUpdateForm(forms.ModelForm):
+class TaskUpdateForm(TaskAssigneesMixin, forms.ModelForm):
     class Meta:
         model = Task
         fields = [
@@ -36,9 +117,76 @@ class TaskUpdateForm(forms.ModelForm):
             "description": forms.Textarea(attrs={"rows": 3}),
             "deadline": forms.DateInput(attrs={"type": "date"}),
         }
+        field_classes = {"task_type": CachedModelChoiceField}
 
 
 class TaskDeleteForm(forms.ModelForm):
     class Meta:
         model = Task
         fields = []
+
+
+class BulkTaskActionForm(forms.Form):
+    ACTIONS = [
+        ("complete", "Mark completed"),
+        ("priority", "Change priority"),
+        ("project", "Move to project"),
+        ("assign", "Add assignees"),
+        ("unassign", "Remove assignees"),
+    ]
+
+    action = forms.ChoiceField(choices=ACTIONS)
+    priority = forms.ChoiceField(choices=Task.Priority.choices, required=False)
+    project = CachedModelChoiceField(queryset=Project.objects.all(), required=False)
+    workers = forms.ModelMultipleChoiceField(queryset=Worker.objects.all(), required=False)
+    select_all = forms.BooleanField(required=False, label="All tasks matching the filters")
+    scope = forms.ChoiceField(choices=[("all", "All tasks"), ("mine", "My tasks")], widget=forms.HiddenInput)
+    filter_query = forms.CharField(required=False, widget=forms.HiddenInput)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        action = cleaned_data.get("action")
+        required = {"priority": "priority", "project": "project", "assign": "workers", "unassign": "workers"}
+        field = required.get(action)
+        if field and not cleaned_data.get(field):
+            self.add_error(field, "This field is required for the selected action.")
+        return cleaned_data
+
+
+class TaskProjectActionForm(forms.Form):
+    project = CachedModelChoiceField(queryset=Project.objects.all(), required=False, empty_label="No project")
+
+
+class TaskWorkersActionForm(forms.Form):
+    workers = forms.ModelMultipleChoiceField(queryset=Worker.objects.all())
+
+
+class TaskDependencyForm(forms.Form):
+    # A task id rather than a select of every open task in the project.
+    blocked_by = forms.IntegerField(
+        label="Blocked by",
+        min_value=1,
+        max_value=models.BigIntegerField.MAX_BIGINT,
+        widget=forms.NumberInput(attrs={"placeholder": "Task id"}),
+    )
+
+    def __init__(self, *args, task, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.task = task
+
+    def candidates(self):
+        task = self.task
+        candidates = Task.objects.for_task(task.pk).filter(is_completed=False).exclude(pk=task.pk).exclude(blocks=task)
+        if task.project_id:
+            candidates = candidates.filter(project_id=task.project_id)
+        return candidates
+
+    def clean_blocked_by(self):
+        blocked_by = self.candidates().filter(pk=self.cleaned_data["blocked_by"]).first()
+        if blocked_by is None:
+            raise ValidationError(
+                "Enter the id of an open task of the same project that does not block this one yet.",
+                code="invalid_choice",
+            )
+        dependencies.check_dependency(self.task, blocked_by)
+        return blocked_by
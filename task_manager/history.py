@@ -0,0 +1,165 @@
+import atexit
+import threading
+import time
+from datetime import date
+
+from django import forms
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.utils import timezone
+
+from .models import Task, TaskChange
+
+
+class ChangeBuffer:
+    """Per-process buffer of task changes, written with one bulk_create per flush.
+
+    Entries only enter the buffer once their transaction commits. The buffer is
+    flushed when it reaches ``size`` entries, before history is read, at
+    interpreter exit, and by a timer thread at most ``interval`` seconds after
+    an entry was buffered, so a quiet process still writes it. An ``interval``
+    of None leaves out the timer.
+    """
+
+    def __init__(self, size, interval):
+        self.size = size
+        self.interval = interval
+        self.entries = []
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def append(self, entry):
+        self.extend([entry])
+
+    def extend(self, entries):
+        with self.lock:
+            self.entries.extend(entries)
+            due = len(self.entries) >= self.size or (
+                self.interval is not None and time.monotonic() - self.last_flush >= self.interval
+            )
+            if not due:
+                self._schedule()
+        if due:
+            self.flush()
+
+    def _schedule(self):
+        # Called with the lock held; one timer covers everything buffered until it fires.
+        if self.interval is None or self.timer is not None:
+            return
+        self.timer = threading.Timer(self.interval, self._flush_on_timer)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread's connection would otherwise stay open until the process exits.
+            connections.close_all()
+
+    def flush(self):
+        with self.lock:
+            entries, self.entries = self.entries, []
+            self.last_flush = time.monotonic()
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if entries:
+            TaskChange.objects.bulk_create(entries)
+        return len(entries)
+
+
+buffer = ChangeBuffer(
+    size=getattr(settings, "TASK_HISTORY_BUFFER_SIZE", 100),
+    interval=getattr(settings, "TASK_HISTORY_FLUSH_INTERVAL", 5),
+)
+
+atexit.register(buffer.flush)
+
+
+def _serialize(value):
+    if isinstance(value, models.Model):
+        return value.pk
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _pks(values):
+    return {value.pk if isinstance(value, models.Model) else int(value) for value in values or ()}
+
+
+def form_changes(form):
+    """Diff a bound, valid task ModelForm against its initial values."""
+    changes = {}
+    for name in form.changed_data:
+        old, new = form.initial.get(name), form.cleaned_data.get(name)
+        if isinstance(form.fields[name], forms.ModelMultipleChoiceField):
+            old, new = _pks(old), _pks(new)
+            changes[name] = {"added": sorted(new - old), "removed": sorted(old - new)}
+        else:
+            changes[name] = [_serialize(old), _serialize(new)]
+    return changes
+
+
+def record_change(task, user, changes):
+    record_changes({task.pk: changes}, user, using=task._state.db)
+
+
+def record_changes(changes_by_task, user, using=None):
+    """Buffer the changes of several tasks, ``{task id: changes}``, with one append once ``using`` commits."""
+    changed_by = user if user is not None and user.is_authenticated else None
+    changed_at = timezone.now()
+    entries = [
+        TaskChange(task_id=task_id, changed_by=changed_by, changed_at=changed_at, changes=changes)
+        for task_id, changes in changes_by_task.items()
+        if changes
+    ]
+    if entries:
+        transaction.on_commit(lambda: buffer.extend(entries), using=using)
+
+
+def task_history(task_id):
+    buffer.flush()
+    return TaskChange.objects.filter(task_id=task_id).select_related("changed_by")
+
+
+def describe(entries):
+    """Turn a page of history entries into rows of (field label, old, new) for display.
+
+    Related objects are shown by name, looked up with one query per related model.
+    """
+    related_ids = {}
+    for entry in entries:
+        for name, change in entry.changes.items():
+            field = Task._meta.get_field(name)
+            if field.many_to_many:
+                related_ids.setdefault(name, set()).update(change["added"], change["removed"])
+            elif field.is_relation:
+                related_ids.setdefault(name, set()).update(pk for pk in change if pk is not None)
+    names = {
+        name: {obj.pk: str(obj) for obj in Task._meta.get_field(name).related_model.objects.filter(pk__in=ids)}
+        for name, ids in related_ids.items()
+    }
+
+    def display(name, value):
+        if name in names:
+            return names[name].get(value, value)
+        return value
+
+    described = []
+    for entry in entries:
+        rows = []
+        for name, change in entry.changes.items():
+            label = Task._meta.get_field(name).verbose_name.capitalize()
+            if name == "assignees":
+                rows.append((
+                    label,
+                    ", ".join(str(display(name, pk)) for pk in change["removed"]) or "-",
+                    ", ".join(str(display(name, pk)) for pk in change["added"]) or "-",
+                ))
+            else:
+                rows.append((label, display(name, change[0]), display(name, change[1])))
+        described.append((entry, rows))
+    return described
@@ -0,0 +1,128 @@
+"""
+iCalendar feeds of task deadlines for workers and projects.
+
+Calendar apps can't log in, so every feed URL carries a signed token. Feeds are
+streamed row by row, and their ETag only reads task ids and change times, so a
+client polling an unchanged feed gets a 304 without the tasks being rendered.
+"""
+
+import hashlib
+import heapq
+from datetime import date, timedelta, timezone as dt_timezone
+from operator import attrgetter
+
+from django.core import signing
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+
+from . import sharding
+from .models import Project, Task, Worker
+
+
+FEED_SALT = "task_manager.ical"
+
+FEED_PAST_DAYS = 90
+
+FEED_CHUNK_SIZE = 500
+
+FEED_OWNERS = {"worker": Worker, "project": Project}
+
+
+def feed_token(kind, pk):
+    return signing.Signer(salt=FEED_SALT).signature(f"{kind}:{pk}")
+
+
+def check_token(kind, pk, token):
+    return constant_time_compare(feed_token(kind, pk), token)
+
+
+def feed_url(request, owner):
+    kind = "worker" if isinstance(owner, Worker) else "project"
+    path = reverse(f"task_manager:{kind}-feed", args=[owner.pk])
+    return request.build_absolute_uri(f"{path}?token={feed_token(kind, owner.pk)}")
+
+
+def feed_tasks(kind, pk, start=None):
+    """The feed's tasks: a queryset, or for a worker with tasks on several shards a ``MergedTasks``."""
+    start = start or date.today() - timedelta(days=FEED_PAST_DAYS)
+    if kind == "worker":
+        return sharding.across_shards(Task.objects.filter(deadline__gte=start, assignees=pk))
+    return Task.objects.for_project(pk).filter(deadline__gte=start)
+
+
+def feed_etag(owner, tasks):
+    """Fingerprint of the feed, from one query per shard for task ids and change times.
+
+    It hashes the ordered ids of the tasks as well as their latest change, so
+    replacing one task of the feed with another changes it too.
+    """
+    rows = sharding.fan_out(
+        lambda queryset: list(queryset.order_by().values_list("pk", "updated_at")),
+        sharding.shard_querysets(tasks),
+    )
+    rows = [row for shard_rows in rows for row in shard_rows]
+    updated = max((changed for _, changed in rows), default=None)
+    fingerprint = hashlib.sha1(f"{owner.pk}:{owner}:{updated}".encode())
+    for pk in sorted(pk for pk, _ in rows):
+        fingerprint.update(f":{pk}".encode())
+    return fingerprint.hexdigest()
+
+
+def escape(text):
+    return (
+        str(text).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def fold(line):
+    # Content lines are at most 75 octets; continuations start with a space.
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, current = [], b""
+    for char in line:
+        size = len(char.encode())
+        if len(current) + size > (75 if not parts else 74):
+            parts.append(current.decode())
+            current = b""
+        current += char.encode()
+    parts.append(current.decode())
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _stamp(moment):
+    return moment.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def event_lines(task, request, host):
+    yield "BEGIN:VEVENT"
+    yield f"UID:task-{task.pk}@{host}"
+    yield f"DTSTAMP:{_stamp(task.updated_at)}"
+    yield f"LAST-MODIFIED:{_stamp(task.updated_at)}"
+    yield f"DTSTART;VALUE=DATE:{task.deadline:%Y%m%d}"
+    yield f"DTEND;VALUE=DATE:{task.deadline + timedelta(days=1):%Y%m%d}"
+    yield f"SUMMARY:{escape(('[Done] ' if task.is_completed else '') + task.name)}"
+    yield f"DESCRIPTION:{escape(task.description)}"
+    yield f"CATEGORIES:{escape(task.priority)}"
+    yield f"URL:{request.build_absolute_uri(reverse('task_manager:task-detail', args=[task.pk]))}"
+    yield "END:VEVENT"
+
+
+def stream_feed(request, owner, tasks):
+    host = request.get_host().split(":")[0]
+    yield "".join(fold(line) for line in (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Sigma Task Manager//Deadlines//EN",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{escape(owner)} deadlines",
+    ))
+    rows = [
+        queryset.only("pk", "name", "description", "deadline", "is_completed", "priority", "updated_at")
+        .order_by("deadline", "pk").iterator(chunk_size=FEED_CHUNK_SIZE)
+        for queryset in sharding.shard_querysets(tasks)
+    ]
+    for task in heapq.merge(*rows, key=attrgetter("deadline", "pk")):
+        yield "".join(fold(line) for line in event_lines(task, request, host))
+    yield fold("END:VCALENDAR")
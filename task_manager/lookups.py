@@ -0,0 +1,94 @@
+"""
+Process-local cache of the small lookup tables (positions, task types, teams, projects).
+
+Every process keeps a full copy of each table. A version number in the shared
+Django cache tells processes when another one changed a table; it is checked at
+most every ``LOOKUP_CACHE_CHECK_INTERVAL`` seconds.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+VERSION_KEY = "lookups:version:{}"
+
+
+class LookupTable:
+
+    def __init__(self, model):
+        self.model = model
+        self.key = VERSION_KEY.format(model._meta.label_lower)
+        self.objects = {}
+        self.version = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def _shared_version(self):
+        version = cache.get(self.key)
+        if version is None:
+            cache.add(self.key, 1, None)
+            version = cache.get(self.key, 1)
+        return version
+
+    def _refresh(self):
+        now = time.monotonic()
+        interval = getattr(settings, "LOOKUP_CACHE_CHECK_INTERVAL", 1)
+        if self.version is not None and now - self.checked_at < interval:
+            return
+        with self.lock:
+            version = self._shared_version()
+            if version != self.version:
+                self.objects = {obj.pk: obj for obj in self.model.objects.all()}
+                self.version = version
+            self.checked_at = now
+
+    def all(self):
+        self._refresh()
+        return list(self.objects.values())
+
+    def get(self, pk):
+        self._refresh()
+        return self.objects.get(pk)
+
+    def invalidate(self):
+        try:
+            cache.incr(self.key)
+        except ValueError:
+            cache.set(self.key, 1, None)
+        self.version = None
+
+
+_tables = {}
+
+
+def table(model):
+    if model not in _tables:
+        _tables[model] = LookupTable(model)
+    return _tables[model]
+
+
+def all_objects(model):
+    return table(model).all()
+
+
+def get(model, pk):
+    return table(model).get(pk)
+
+
+def invalidate(model):
+    table(model).invalidate()
+
+
+def related(instance, field_name):
+    """Return a lookup foreign key of ``instance`` without querying for it."""
+    field = instance._meta.get_field(field_name)
+    if field.is_cached(instance):
+        return getattr(instance, field_name)
+    pk = getattr(instance, field.attname)
+    if pk is None:
+        return None
+    # Created by another process since our last version check: fall back to a query.
+    return get(field.related_model, pk) or getattr(instance, field_name)
@@ -0,0 +1,26 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from task_manager.archive import ARCHIVE_BATCH_SIZE, archive_completed_tasks
+
+
+class Command(BaseCommand):
+    help = "Move completed tasks older than the cutoff into the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=90,
+            help="Archive completed tasks whose deadline is more than this many days ago.",
+        )
+        parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        cutoff = date.today() - timedelta(days=options["days"])
+        archived = archive_completed_tasks(cutoff, batch_size=options["batch_size"])
+        if options["verbosity"] > 0:
+            self.stdout.write(
+                self.style.SUCCESS(f"Archived {archived} task(s) with a deadline before {cutoff}.")
+            )
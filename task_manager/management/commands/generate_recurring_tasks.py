@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from task_manager.recurrence import RECURRENCE_BATCH_SIZE, RECURRENCE_HORIZON_DAYS, generate_recurring_tasks
+
+
+class Command(BaseCommand):
+    help = "Create the upcoming tasks of every active recurring task template."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=RECURRENCE_HORIZON_DAYS,
+            help="Create occurrences up to this many days ahead.",
+        )
+        parser.add_argument("--batch-size", type=int, default=RECURRENCE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        created = generate_recurring_tasks(horizon_days=options["days"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} recurring task occurrence(s)."))
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from task_manager.deletion import DELETION_BATCH_SIZE, DELETION_STALE_AFTER, run_deletion_job
+from task_manager.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = "Run deletion jobs that are pending or were interrupted (e.g. by a worker restart)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DELETION_BATCH_SIZE)
+        parser.add_argument(
+            "--stale-after", type=int, default=int(DELETION_STALE_AFTER.total_seconds()),
+            help="Seconds without progress after which a running job is resumed.",
+        )
+
+    def handle(self, *args, **options):
+        jobs = DeletionJob.objects.filter(
+            status__in=[DeletionJob.Status.PENDING, DeletionJob.Status.RUNNING]
+        ).order_by("created_at")
+        stale_after = timedelta(seconds=options["stale_after"])
+        for job in jobs:
+            finished = run_deletion_job(job, batch_size=options["batch_size"], stale_after=stale_after)
+            if finished is None:
+                self.stdout.write(f"{job}: running in another worker, skipped")
+                continue
+            self.stdout.write(f"{finished}: {finished.processed}/{finished.total} rows, {finished.get_status_display()}")
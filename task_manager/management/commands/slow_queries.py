@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from task_manager.models import SlowQuery
+
+
+ORDERINGS = {
+    "total": "-total_ms",
+    "max": "-max_ms",
+    "calls": "-calls",
+}
+
+
+class Command(BaseCommand):
+    help = "Show the slowest logged queries and their EXPLAIN plans."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--order", choices=ORDERINGS, default="total", help="Rank by total time, max time or calls.")
+        parser.add_argument("--view", help="Only show queries issued by this view name.")
+        parser.add_argument("--clear", action="store_true", help="Delete the log after printing it.")
+
+    def handle(self, *args, **options):
+        queries = SlowQuery.objects.order_by(ORDERINGS[options["order"]])
+        if options["view"]:
+            queries = queries.filter(view_name=options["view"])
+
+        shown = 0
+        for query in queries[:options["limit"]]:
+            shown += 1
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{query.view_name or '-'}: {query.calls} call(s), "
+                f"{query.total_ms:.1f} ms total, {query.total_ms / query.calls:.1f} ms avg, {query.max_ms:.1f} ms max"
+            ))
+            self.stdout.write(f"  {query.sql}")
+            for line in query.explain.splitlines():
+                self.stdout.write(f"    {line}")
+        if not shown:
+            self.stdout.write("No slow queries logged.")
+
+        if options["clear"]:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f"Cleared {deleted} slow query record(s)."))
@@ -1,5 +1,8 @@
-from django.db import models
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, models, router
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Lower
 
 
 class Position(models.Model):
@@ -21,12 +24,27 @@ class Teams(models.Model):
     get_workers.short_description = "Members"
 
 
+# With several task shards, tasks reference rows in "default" from another database.
+TASK_CONSTRAINTS = len(getattr(settings, "TASK_SHARDS", ["default"])) < 2
+
+
 class Project(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    is_pending_deletion = models.BooleanField(default=False)
+    shard = models.CharField(
+        max_length=50, blank=True,
+        help_text="Database holding this project's tasks, one of TASK_SHARDS. Blank means the first one.",
+    )
 
     def __str__(self):
         return self.name
 
+    def clean(self):
+        from .sharding import shards
+
+        if self.shard and self.shard not in shards():
+            raise ValidationError({"shard": f"Choose one of: {', '.join(shards())}."})
+
     def get_tasks(self):
         return ", ".join(task.name for task in self.tasks.all())
 
@@ -37,17 +55,47 @@ class Worker(AbstractUser):
     position = models.ForeignKey(Position, on_delete=models.SET_NULL, null=True, related_name="workers")
     team = models.ForeignKey(Teams, on_delete=models.SET_NULL, null=True, related_name="members")
     def __str__(self):
-        return f"{self.username} ({self.position})" if self.position else self.username
+        from .lookups import related
 
+        position = related(self, "position")
+        return f"{self.username} ({position})" if position else self.username
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(Lower("username"), name="worker_username_lower_idx"),
+            models.Index(Lower("first_name"), name="worker_first_name_lower_idx"),
+            models.Index(Lower("last_name"), name="worker_last_name_lower_idx"),
+        ]
 
 
 class TaskType(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    is_pending_deletion = models.BooleanField(default=False)
 
     def __str__(self):
         return self.name
 
 
+class TaskQuerySet(models.QuerySet):
+
+    def for_project(self, project_id):
+        from .sharding import project_shard
+
+        return self.using(project_shard(project_id)).filter(project_id=project_id)
+
+    def for_task(self, pk):
+        """Tasks on the shard that holds task ``pk``."""
+        from .sharding import task_shard
+
+        return self.using(task_shard(pk))
+
+    def create(self, **kwargs):
+        # QuerySet.create() routes by model only; route by the new task so it lands on its project's shard.
+        if self._db is None:
+            return self.using(router.db_for_write(self.model, instance=self.model(**kwargs))).create(**kwargs)
+        return super().create(**kwargs)
+
+
 class Task(models.Model):
     class Priority(models.TextChoices):
         LOW = "Low"
@@ -64,11 +112,198 @@ class Task(models.Model):
         choices=Priority.choices,
         default=Priority.MEDIUM
     )
-    task_type = models.ForeignKey(TaskType, on_delete=models.CASCADE, related_name="tasks")
-    assignees = models.ManyToManyField(Worker, related_name="tasks")
-    project = models.ForeignKey(Project, on_delete=models.SET_NULL, null=True, related_name="tasks")
+    task_type = models.ForeignKey(
+        TaskType, on_delete=models.CASCADE, related_name="tasks", db_constraint=TASK_CONSTRAINTS
+    )
+    assignees = models.ManyToManyField(Worker, related_name="tasks", db_constraint=TASK_CONSTRAINTS)
+    project = models.ForeignKey(
+        Project, on_delete=models.SET_NULL, null=True, related_name="tasks", db_constraint=TASK_CONSTRAINTS
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    blocked_by = models.ManyToManyField(
+        "self", through="TaskDependency", symmetrical=False, related_name="blocks", blank=True
+    )
+    recurrence = models.ForeignKey(
+        "RecurringTask", on_delete=models.SET_NULL, null=True, blank=True, related_name="occurrences",
+        db_constraint=TASK_CONSTRAINTS,
+    )
+    occurrence_date = models.DateField(null=True, blank=True)
+
+    objects = TaskQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} ({self.priority})"
 
+    def assignee_ids(self):
+        links = Task.assignees.through.objects.using(self._state.db).filter(task_id=self.pk)
+        return list(links.values_list("worker_id", flat=True))
+
+    def get_assignees(self):
+        """Assigned workers, read by id when the task's links are on a shard without the workers table."""
+        if self._state.db in (None, DEFAULT_DB_ALIAS):
+            return self.assignees.all()
+        return Worker.objects.filter(pk__in=self.assignee_ids())
+
+    def set_assignees(self, workers):
+        """Like ``assignees.set()``, which would join workers to the links on the task's shard."""
+        old_ids = set(self.assignee_ids())
+        new_ids = {worker.pk for worker in workers}
+        if old_ids - new_ids:
+            self.assignees.remove(*(old_ids - new_ids))
+        if new_ids - old_ids:
+            self.assignees.add(*(new_ids - old_ids))
+
     class Meta:
         ordering = ["deadline", "priority"]
+        indexes = [
+            models.Index(fields=["deadline", "priority"], name="task_deadline_priority_idx"),
+            models.Index(fields=["priority", "deadline"], name="task_priority_deadline_idx"),
+            models.Index(fields=["is_completed", "deadline"], name="task_completed_deadline_idx"),
+            models.Index(fields=["project", "deadline"], name="task_project_deadline_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["recurrence", "occurrence_date"], name="task_recurrence_occurrence_unique"),
+        ]
+
+
+class RecurringTask(models.Model):
+    class Frequency(models.TextChoices):
+        DAILY = "daily", "Daily"
+        WEEKLY = "weekly", "Weekly"
+        MONTHLY = "monthly", "Monthly"
+
+    name = models.CharField(max_length=200)
+    description = models.TextField()
+    priority = models.CharField(max_length=10, choices=Task.Priority.choices, default=Task.Priority.MEDIUM)
+    task_type = models.ForeignKey(TaskType, on_delete=models.CASCADE, related_name="recurring_tasks")
+    project = models.ForeignKey(Project, on_delete=models.SET_NULL, null=True, blank=True, related_name="recurring_tasks")
+    assignees = models.ManyToManyField(Worker, related_name="recurring_tasks", blank=True)
+    frequency = models.CharField(max_length=10, choices=Frequency.choices, default=Frequency.WEEKLY)
+    interval = models.PositiveSmallIntegerField(default=1, help_text="Repeat every this many days, weeks or months.")
+    weekdays = models.CharField(
+        max_length=13, blank=True,
+        help_text="Weekly only: comma separated weekday numbers, 0 is Monday. Defaults to the start date's weekday.",
+    )
+    starts_on = models.DateField()
+    ends_on = models.DateField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    generated_until = models.DateField(null=True, blank=True, editable=False)
+
+    def __str__(self):
+        return f"{self.name} ({self.get_frequency_display().lower()})"
+
+
+class TaskDependency(models.Model):
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="dependency_links")
+    blocked_by = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="blocking_links")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.task_id} blocked by {self.blocked_by_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["task", "blocked_by"], name="taskdependency_unique"),
+            models.CheckConstraint(condition=~models.Q(task=models.F("blocked_by")), name="taskdependency_not_self"),
+        ]
+        indexes = [
+            models.Index(fields=["blocked_by", "task"], name="taskdependency_reverse_idx"),
+        ]
+
+
+class ArchivedTask(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=200)
+    description = models.TextField()
+    deadline = models.DateField()
+    is_completed = models.BooleanField(default=True)
+    priority = models.CharField(
+        max_length=10,
+        choices=Task.Priority.choices,
+        default=Task.Priority.MEDIUM
+    )
+    task_type = models.ForeignKey(TaskType, on_delete=models.CASCADE, related_name="archived_tasks")
+    assignees = models.ManyToManyField(Worker, related_name="archived_tasks")
+    project = models.ForeignKey(Project, on_delete=models.SET_NULL, null=True, related_name="archived_tasks")
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.priority})"
+
+    class Meta:
+        ordering = ["-deadline"]
+
+
+class DeletionJob(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "Pending"
+        RUNNING = "Running"
+        DONE = "Done"
+        FAILED = "Failed"
+
+    class Target(models.TextChoices):
+        TASK_TYPE = "task_type", "Task type"
+        PROJECT = "project", "Project"
+
+    target = models.CharField(max_length=20, choices=Target.choices)
+    target_id = models.BigIntegerField()
+    target_name = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when a worker claims the job and after every batch; a stale one means the worker died.
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Delete {self.get_target_display().lower()} {self.target_name}"
+
+    def progress(self):
+        if not self.total:
+            return "100%" if self.status == self.Status.DONE else "0%"
+        return f"{min(self.processed * 100 // self.total, 100)}%"
+
+    progress.short_description = "Progress"
+
+    class Meta:
+        ordering = ["-created_at"]
+
+
+class TaskChange(models.Model):
+    # A plain id rather than a foreign key: history outlives archived and deleted tasks.
+    task_id = models.BigIntegerField()
+    changed_by = models.ForeignKey(Worker, on_delete=models.SET_NULL, null=True, related_name="task_changes")
+    changed_at = models.DateTimeField()
+    changes = models.JSONField()
+
+    def __str__(self):
+        return f"Task {self.task_id} changed at {self.changed_at:%Y-%m-%d %H:%M}"
+
+    class Meta:
+        ordering = ["-changed_at", "-id"]
+        indexes = [
+            models.Index(fields=["task_id", "-changed_at"], name="taskchange_task_changed_idx"),
+        ]
+
+
+class SlowQuery(models.Model):
+    fingerprint = models.CharField(max_length=40)
+    sql = models.TextField()
+    view_name = models.CharField(max_length=200, blank=True)
+    calls = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    explain = models.TextField(blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.view_name or '-'}: {self.sql[:80]}"
+
+    class Meta:
+        ordering = ["-total_ms"]
+        constraints = [
+            models.UniqueConstraint(fields=["fingerprint", "view_name"], name="slowquery_fingerprint_view_unique"),
+        ]
@@ -0,0 +1,134 @@
+"""
+Opt-in per-request profiling for staff users.
+
+Send ``X-Profile: 1`` or add ``?_profile=1`` to run the view and its template
+rendering under cProfile; any other value leaves profiling off. The profile and a
+timeline of the SQL queries are saved to ``PROFILE_DIR`` and listed on the staff
+profiles page. Requests that don't ask for it only pay for a header and a query
+parameter lookup.
+"""
+
+import cProfile
+import json
+import pstats
+import re
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from . import sharding
+
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_PARAM = "_profile"
+
+
+def profiling_requested(request):
+    return request.META.get(PROFILE_HEADER) == "1" or request.GET.get(PROFILE_PARAM) == "1"
+
+
+def profile_dir():
+    return Path(getattr(settings, "PROFILE_DIR", settings.BASE_DIR / "profiles"))
+
+
+class ProfilerMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling_requested(request):
+            return self.get_response(request)
+        if not request.user.is_staff:
+            return self.get_response(request)
+        return self.profile(request)
+
+    def profile(self, request):
+        queries = []
+        started = time.perf_counter()
+
+        def record_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append({
+                    "alias": context["connection"].alias,
+                    "sql": sql,
+                    "start_ms": (start - started) * 1000,
+                    "duration_ms": (time.perf_counter() - start) * 1000,
+                })
+
+        profiler = cProfile.Profile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record_query))
+            # cProfile only sees this thread, so cross-shard queries are not handed to the pool.
+            stack.enter_context(sharding.inline_fan_out())
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        save_profile(request, response, profiler, queries, (time.perf_counter() - started) * 1000)
+        return response
+
+
+def save_profile(request, response, profiler, queries, total_ms):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profile_id = f"{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+    profiler.dump_stats(directory / f"{profile_id}.prof")
+    (directory / f"{profile_id}.json").write_text(json.dumps({
+        "id": profile_id,
+        "method": request.method,
+        "path": request.get_full_path(),
+        "view": request.resolver_match.view_name if request.resolver_match else None,
+        "status": response.status_code,
+        "user": request.user.get_username(),
+        "total_ms": total_ms,
+        "sql_ms": sum(query["duration_ms"] for query in queries),
+        "queries": queries,
+    }))
+    _prune(directory, getattr(settings, "PROFILE_KEEP", 50))
+    return profile_id
+
+
+def _prune(directory, keep):
+    for meta in sorted(directory.glob("*.json"), reverse=True)[keep:]:
+        meta.unlink(missing_ok=True)
+        meta.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def recent_profiles(limit=50):
+    profiles = []
+    for meta in sorted(profile_dir().glob("*.json"), reverse=True)[:limit]:
+        profiles.append(json.loads(meta.read_text()))
+    return profiles
+
+
+def load_profile(profile_id, functions=25, queries=10):
+    directory = profile_dir()
+    meta_path = directory / f"{profile_id}.json"
+    if not re.fullmatch(r"[\w-]+", profile_id) or not meta_path.exists():
+        return None
+    profile = json.loads(meta_path.read_text())
+
+    stats = pstats.Stats(str(directory / f"{profile_id}.prof"))
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    profile["top_functions"] = [
+        {
+            "function": pstats.func_std_string(func),
+            "calls": stats.stats[func][1],
+            "own_ms": stats.stats[func][2] * 1000,
+            "cumulative_ms": stats.stats[func][3] * 1000,
+        }
+        for func in stats.fcn_list[:functions]
+    ]
+    profile["hottest_queries"] = sorted(profile["queries"], key=lambda query: -query["duration_ms"])[:queries]
+    return profile
@@ -0,0 +1,170 @@
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+
+from . import caching, dependencies, sharding
+from .models import RecurringTask, Task
+
+
+RECURRENCE_HORIZON_DAYS = 30
+
+RECURRENCE_BATCH_SIZE = 500
+
+
+def _add_months(day, months, on_day):
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(on_day, calendar.monthrange(year, month)[1]))
+
+
+def occurrences(template, start, end):
+    """Dates of ``template`` between ``start`` and ``end``, both included."""
+    first = template.starts_on
+    end = min(end, template.ends_on) if template.ends_on else end
+    interval = max(template.interval, 1)
+    start = max(start, first)
+    if start > end:
+        return []
+
+    if template.frequency == RecurringTask.Frequency.DAILY:
+        skip = -(-(start - first).days // interval)
+        day = first + timedelta(days=skip * interval)
+        dates = []
+        while day <= end:
+            dates.append(day)
+            day += timedelta(days=interval)
+        return dates
+
+    if template.frequency == RecurringTask.Frequency.WEEKLY:
+        weekdays = sorted({int(value) for value in template.weekdays.split(",") if value.strip().isdigit()} & set(range(7)))
+        weekdays = weekdays or [first.weekday()]
+        first_monday = first - timedelta(days=first.weekday())
+        dates = []
+        week = (start - first_monday).days // 7
+        week += -week % interval
+        while True:
+            monday = first_monday + timedelta(weeks=week)
+            if monday > end:
+                return dates
+            dates.extend(
+                day for day in (monday + timedelta(days=weekday) for weekday in weekdays)
+                if start <= day <= end
+            )
+            week += interval
+
+    months = (start.year - first.year) * 12 + start.month - first.month
+    months += -months % interval
+    dates = []
+    while True:
+        day = _add_months(first, months, first.day)
+        if day > end:
+            return dates
+        if day >= start:
+            dates.append(day)
+        months += interval
+
+
+def generate_recurring_tasks(today=None, horizon_days=RECURRENCE_HORIZON_DAYS, batch_size=RECURRENCE_BATCH_SIZE):
+    """Create the tasks of every active template up to ``horizon_days`` ahead.
+
+    Templates are handled ``batch_size`` at a time with a fixed number of queries
+    per batch, however many occurrences each one has. Running it twice creates
+    nothing new: (template, occurrence date) is unique on Task.
+    """
+    today = today or date.today()
+    horizon = today + timedelta(days=horizon_days)
+    templates = RecurringTask.objects.filter(
+        Q(ends_on__isnull=True) | Q(ends_on__gte=today),
+        Q(generated_until__isnull=True) | Q(generated_until__lt=horizon),
+        is_active=True,
+        starts_on__lte=horizon,
+    ).order_by("pk")
+
+    created, last_pk = 0, 0
+    while True:
+        batch = list(templates.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return created
+        created += _generate_batch(batch, today, horizon)
+        last_pk = batch[-1].pk
+
+
+@transaction.atomic
+def _generate_batch(templates, today, horizon):
+    by_pk = {template.pk: template for template in templates}
+    assignees = {}
+    for template_id, worker_id in RecurringTask.assignees.through.objects.filter(
+        recurringtask_id__in=by_pk
+    ).values_list("recurringtask_id", "worker_id"):
+        assignees.setdefault(template_id, []).append(worker_id)
+
+    wanted = set()
+    for template in templates:
+        start = max(today, template.generated_until + timedelta(days=1)) if template.generated_until else today
+        wanted.update((template.pk, day) for day in occurrences(template, start, horizon))
+
+    # Occurrences are created on the shard of the template's project.
+    shard_of = {template.pk: sharding.project_shard(template.project_id) for template in templates}
+    shards = defaultdict(set)
+    for template_id, day in wanted:
+        shards[shard_of[template_id]].add((template_id, day))
+    created = 0
+    for alias, shard_wanted in shards.items():
+        with transaction.atomic(using=alias):
+            created += _create_occurrences(shard_wanted, by_pk, assignees, today, horizon, using=alias)
+    if created:
+        dependencies.invalidate_projects({template.project_id for template in templates})
+
+    for template in templates:
+        template.generated_until = horizon
+    RecurringTask.objects.bulk_update(templates, ["generated_until"])
+    return created
+
+
+def _create_occurrences(wanted, by_pk, assignees, today, horizon, using):
+    tasks = Task.objects.using(using)
+    template_ids = {template_id for template_id, _ in wanted}
+    new = sorted(wanted - set(
+        tasks.filter(recurrence_id__in=template_ids, occurrence_date__range=(today, horizon))
+        .order_by().values_list("recurrence_id", "occurrence_date")
+    ))
+    if not new:
+        return 0
+    tasks.bulk_create(
+        [
+            Task(
+                name=by_pk[template_id].name,
+                description=by_pk[template_id].description,
+                deadline=day,
+                priority=by_pk[template_id].priority,
+                task_type_id=by_pk[template_id].task_type_id,
+                project_id=by_pk[template_id].project_id,
+                recurrence_id=template_id,
+                occurrence_date=day,
+            )
+            for template_id, day in new
+        ],
+        ignore_conflicts=True,
+    )
+    # ignore_conflicts leaves primary keys unset, so the new rows are selected back.
+    new_keys = set(new)
+    created = [
+        (pk, template_id)
+        for pk, template_id, day in tasks.filter(
+            recurrence_id__in=template_ids, occurrence_date__range=(today, horizon)
+        ).order_by().values_list("pk", "recurrence_id", "occurrence_date")
+        if (template_id, day) in new_keys
+    ]
+    Task.assignees.through.objects.using(using).bulk_create(
+        [
+            Task.assignees.through(task_id=pk, worker_id=worker_id)
+            for pk, template_id in created
+            for worker_id in assignees.get(template_id, ())
+        ],
+        ignore_conflicts=True,
+    )
+    caching.invalidate_on_commit("tasks", using=using)
+    return len(created)
@@ -0,0 +1,83 @@
+"""
+Worker directory search.
+
+Terms match by prefix so the lookups can use an index. SQLite and other backends
+compare ``LOWER(column)`` ranges, which is served by the functional indexes on
+Worker. PostgreSQL uses ``ILIKE 'term%'`` instead, served by the pg_trgm indexes
+that ``create_trigram_indexes`` adds after migrate. Results are ranked: exact
+username first, then username or name prefixes, then team matches.
+"""
+
+from django.db import connections, router
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Lower
+
+from . import lookups
+from .models import Teams, Worker
+
+
+SEARCH_FIELDS = ("username", "first_name", "last_name")
+
+TRIGRAM_INDEXES = [
+    ("worker_username_trgm_idx", Worker, "username"),
+    ("worker_first_name_trgm_idx", Worker, "first_name"),
+    ("worker_last_name_trgm_idx", Worker, "last_name"),
+    ("teams_name_trgm_idx", Teams, "name"),
+]
+
+RANK_EXACT = 3
+RANK_PREFIX = 2
+RANK_TEAM = 1
+
+
+def _uses_trigrams():
+    return connections[router.db_for_read(Worker)].vendor == "postgresql"
+
+
+def _prefix(field, term):
+    if _uses_trigrams():
+        return Q(**{f"{field}__istartswith": term})
+    # Every string starting with ``term`` sorts between it and the next possible prefix.
+    upper = term[:-1] + chr(ord(term[-1]) + 1)
+    return Q(**{f"{field}_lower__gte": term, f"{field}_lower__lt": upper})
+
+
+def search_workers(query):
+    term = query.strip().lower()
+    queryset = Worker.objects.select_related("position", "team")
+    if not term:
+        return queryset.order_by("username")
+
+    # Teams come from the in-process lookup table, so matching them needs no query.
+    team_ids = [team.pk for team in lookups.all_objects(Teams) if team.name.lower().startswith(term)]
+    name_prefix = _prefix("first_name", term) | _prefix("last_name", term) | _prefix("username", term)
+    exact = Q(username_lower=term) if not _uses_trigrams() else Q(username__iexact=term)
+
+    return (
+        queryset.alias(**{f"{field}_lower": Lower(field) for field in SEARCH_FIELDS})
+        .filter(name_prefix | Q(team_id__in=team_ids))
+        .annotate(
+            rank=Case(
+                When(exact, then=Value(RANK_EXACT)),
+                When(name_prefix, then=Value(RANK_PREFIX)),
+                default=Value(RANK_TEAM),
+                output_field=IntegerField(),
+            )
+        )
+        .order_by("-rank", "username")
+    )
+
+
+def create_trigram_indexes(sender, using, **kwargs):
+    """post_migrate hook adding pg_trgm indexes for the ILIKE prefix searches on PostgreSQL."""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, model, field in TRIGRAM_INDEXES:
+            column = connection.ops.quote_name(model._meta.get_field(field).column)
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} ON {connection.ops.quote_name(model._meta.db_table)} "
+                f"USING gin (UPPER({column}) gin_trgm_ops)"
+            )
@@ -0,0 +1,293 @@
+"""
+Optional per-project sharding of tasks across databases.
+
+``settings.TASK_SHARDS`` lists the database aliases holding tasks. A task, its
+assignee links and its dependency edges live on the shard named by its project
+(``Project.shard``, blank for the first shard); every other table stays on
+"default". Each shard hands out task ids from its own range of ``SHARD_ID_SPAN``
+ids, so the shard of any task id is known without a query.
+
+``ShardRouter`` sends reads and writes of a task instance, and of tasks related to
+a project or task, to the right database. Lists spanning projects go through
+``across_shards()``, which queries every shard in use concurrently and merges the
+rows in deadline order. Archived tasks from every shard are kept on "default".
+"""
+
+import heapq
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import partial, wraps
+from itertools import islice
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import QuerySet
+
+
+SHARD_ID_SPAN = 10 ** 12
+
+SHARDED_MODELS = {"task_manager.task", "task_manager.task_assignees", "task_manager.taskdependency"}
+
+MERGE_ORDER = ("deadline", "priority", "pk")
+
+FAN_OUT_WORKERS = 8
+
+
+def shards():
+    return list(getattr(settings, "TASK_SHARDS", None) or ["default"])
+
+
+def default_shard():
+    return shards()[0]
+
+
+def is_sharded_model(model):
+    # Models and instances alike; instances may be lazy objects such as request.user.
+    return model._meta.label_lower in SHARDED_MODELS
+
+
+def project_shard(project_id):
+    from . import lookups
+    from .models import Project
+
+    if project_id is None:
+        return default_shard()
+    project = lookups.get(Project, project_id) or Project.objects.filter(pk=project_id).first()
+    return _shard_of(project) if project else default_shard()
+
+
+def _shard_of(project):
+    if not project.shard:
+        return default_shard()
+    if project.shard not in shards():
+        raise ImproperlyConfigured(f"Project {project.pk} is on shard {project.shard!r}, which is not in TASK_SHARDS.")
+    return project.shard
+
+
+def task_shard(task_id):
+    aliases = shards()
+    index = int(task_id) // SHARD_ID_SPAN
+    return aliases[index] if index < len(aliases) else aliases[0]
+
+
+def shards_in_use():
+    """Shards holding any tasks: the first one, and those some project is placed on."""
+    from . import lookups
+    from .models import Project
+
+    aliases = shards()
+    if len(aliases) == 1:
+        return aliases
+    used = {project.shard for project in lookups.all_objects(Project)}
+    return [alias for index, alias in enumerate(aliases) if not index or alias in used]
+
+
+def group_task_ids(ids):
+    grouped = defaultdict(list)
+    for task_id in ids:
+        grouped[task_shard(task_id)].append(task_id)
+    return dict(grouped)
+
+
+def per_shard(function):
+    """Run ``function(tasks, ..., using=alias)`` in a transaction on each shard holding some of ``tasks``.
+
+    ``tasks`` is a list of task ids, or a task queryset (e.g. from ``across_shards()``)
+    whose rows the database picks itself; each shard then gets its own queryset.
+    Returns the sum of the results.
+    """
+    @wraps(function)
+    def wrapper(tasks, *args, **kwargs):
+        if isinstance(tasks, (QuerySet, MergedTasks)):
+            parts = {queryset.db: queryset.order_by() for queryset in shard_querysets(tasks)}
+        else:
+            parts = group_task_ids(tasks)
+        total = 0
+        for alias, shard_tasks in parts.items():
+            with transaction.atomic(using=alias):
+                total += function(shard_tasks, *args, using=alias, **kwargs)
+        return total
+
+    return wrapper
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+_inline = ContextVar("fan_out_inline", default=False)
+
+
+@contextmanager
+def inline_fan_out():
+    """Run every ``fan_out()`` on the calling thread, e.g. while cProfile watches it."""
+    token = _inline.set(True)
+    try:
+        yield
+    finally:
+        _inline.reset(token)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FAN_OUT_WORKERS, thread_name_prefix="task-shards")
+    return _executor
+
+
+def _run(function, wrappers, queryset):
+    # Pool threads keep their own connections, closed like a request's once obsolete.
+    connection = connections[queryset.db]
+    connection.close_if_unusable_or_obsolete()
+    try:
+        # The caller's execute wrappers (profiler, slow query log) also see these queries.
+        with ExitStack() as stack:
+            for wrapper in wrappers:
+                stack.enter_context(connection.execute_wrapper(wrapper))
+            return function(queryset)
+    finally:
+        connection.close_if_unusable_or_obsolete()
+
+
+def fan_out(function, querysets):
+    """``[function(queryset) for queryset in querysets]``, with each queryset run from its own thread.
+
+    Inside a transaction everything runs on this thread, since other connections
+    can't see its uncommitted rows.
+    """
+    querysets = list(querysets)
+    if len(querysets) < 2 or _inline.get() or any(connections[queryset.db].in_atomic_block for queryset in querysets):
+        return [function(queryset) for queryset in querysets]
+    wrappers = [list(connections[queryset.db].execute_wrappers) for queryset in querysets]
+    return list(_get_executor().map(partial(_run, function), wrappers, querysets))
+
+
+class MergedTasks:
+    """Tasks from several shards as one read-only sequence ordered by ``MERGE_ORDER``.
+
+    Implements what Paginator, ListView and templates use. Counting and slicing
+    query every shard concurrently; a slice reads at most ``stop`` rows per shard.
+    """
+    ordered = True
+
+    def __init__(self, querysets):
+        self.querysets = [queryset.order_by(*MERGE_ORDER) for queryset in querysets]
+        self.model = self.querysets[0].model
+        self._result_cache = None
+
+    def _merge(self, results):
+        return heapq.merge(*results, key=attrgetter(*MERGE_ORDER))
+
+    def _fetch_all(self):
+        if self._result_cache is None:
+            self._result_cache = list(self._merge(fan_out(list, self.querysets)))
+
+    def count(self):
+        if self._result_cache is not None:
+            return len(self._result_cache)
+        return sum(fan_out(lambda queryset: queryset.count(), self.querysets))
+
+    def __len__(self):
+        self._fetch_all()
+        return len(self._result_cache)
+
+    def __iter__(self):
+        self._fetch_all()
+        return iter(self._result_cache)
+
+    def __bool__(self):
+        self._fetch_all()
+        return bool(self._result_cache)
+
+    def __getitem__(self, index):
+        if self._result_cache is not None:
+            return self._result_cache[index]
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if index.stop is None:
+            self._fetch_all()
+            return self._result_cache[index]
+        rows = fan_out(lambda queryset: list(queryset[:index.stop]), self.querysets)
+        return list(islice(self._merge(rows), index.start or 0, index.stop, index.step))
+
+
+def across_shards(queryset):
+    """``queryset`` run on every shard in use, or left alone when there is only one."""
+    aliases = shards_in_use()
+    if len(aliases) == 1:
+        return queryset if queryset.db == aliases[0] else queryset.using(aliases[0])
+    return MergedTasks([queryset.using(alias) for alias in aliases])
+
+
+def shard_querysets(tasks):
+    return tasks.querysets if isinstance(tasks, MergedTasks) else [tasks]
+
+
+class ShardRouter:
+    """Routes task rows to the shard of their project; everything else uses "default"."""
+
+    def _db_for_instance(self, model, instance):
+        from .models import Project, Task
+
+        if instance is None:
+            return None
+        if not is_sharded_model(model):
+            # Workers, projects and task types related to a task are not on its shard.
+            return DEFAULT_DB_ALIAS if is_sharded_model(instance) else None
+        if isinstance(instance, Project):
+            return _shard_of(instance)
+        if isinstance(instance, Task):
+            # Assigning a foreign key pins new instances to the related row's database, usually "default".
+            if instance._state.db and not instance._state.adding:
+                return instance._state.db
+            return task_shard(instance.pk) if instance.pk else project_shard(instance.project_id)
+        task_id = getattr(instance, "task_id", None)
+        return task_shard(task_id) if task_id else None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for_instance(model, hints.get("instance"))
+
+    def db_for_write(self, model, **hints):
+        return self._db_for_instance(model, hints.get("instance"))
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Task rows point at shared rows in "default" by id.
+        if is_sharded_model(obj1) or is_sharded_model(obj2):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == "default" or db not in shards():
+            return None
+        return f"{app_label}.{model_name}" in SHARDED_MODELS
+
+
+def reserve_task_ids(sender, using, **kwargs):
+    """post_migrate hook starting task ids on the n-th shard at ``n * SHARD_ID_SPAN``."""
+    from .models import Task
+
+    aliases = shards()
+    if using not in aliases or not aliases.index(using):
+        return
+    offset = aliases.index(using) * SHARD_ID_SPAN
+    connection = connections[using]
+    table = Task._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, %s) WHERE name = %s", [offset, table])
+            if not cursor.rowcount:
+                cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", [table, offset])
+        elif connection.vendor == "postgresql":
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                f"GREATEST(%s, (SELECT COALESCE(MAX(id), 0) FROM {connection.ops.quote_name(table)})))",
+                [table, offset],
+            )
+        elif connection.vendor == "mysql":
+            # MySQL ignores values below the current maximum.
+            cursor.execute(f"ALTER TABLE {connection.ops.quote_name(table)} AUTO_INCREMENT = {offset + 1}")
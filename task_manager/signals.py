@@ -0,0 +1,87 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import caching, dependencies, events, lookups
+from .models import Position, Project, Task, TaskDependency, TaskType, Teams
+
+
+LOOKUP_MODELS = (Position, Project, TaskType, Teams)
+
+CACHE_NAMESPACES = {Project: "projects", Task: "tasks"}
+
+
+def _assignee_ids(task):
+    links = Task.assignees.through.objects.using(task._state.db)
+    return links.filter(task_id=task.pk).values_list("worker_id", flat=True)
+
+
+@receiver(post_save, sender=Task)
+def publish_task_saved(sender, instance, created, using, **kwargs):
+    if created:
+        action = "created"
+    elif instance.is_completed:
+        action = "completed"
+    else:
+        action = "updated"
+    # Assignees are usually set after the row is saved, so they are read when the event is built.
+    events.publish(action, lambda: [events.task_payload(instance, _assignee_ids(instance))], using=using)
+
+
+@receiver(pre_delete, sender=Task)
+def publish_task_deleted(sender, instance, using, **kwargs):
+    events.publish("deleted", [events.task_payload(instance, list(_assignee_ids(instance)))], using=using)
+
+
+@receiver(m2m_changed, sender=Task.assignees.through)
+def publish_assignees_changed(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if reverse or action not in ("post_add", "post_remove"):
+        return
+    unassigned = pk_set if action == "post_remove" else ()
+    events.publish(
+        "updated", lambda: [events.task_payload(instance, _assignee_ids(instance), unassigned)], using=using
+    )
+
+
+def invalidate_lookup(sender, using, **kwargs):
+    # Immediately for this process, and again once other processes can see the change.
+    lookups.invalidate(sender)
+    transaction.on_commit(lambda: lookups.invalidate(sender), using=using)
+
+
+for model in LOOKUP_MODELS:
+    post_save.connect(invalidate_lookup, sender=model, dispatch_uid=f"invalidate_lookup_save_{model.__name__}")
+    post_delete.connect(invalidate_lookup, sender=model, dispatch_uid=f"invalidate_lookup_delete_{model.__name__}")
+
+
+def invalidate_cached(sender, using, **kwargs):
+    caching.invalidate_on_commit(CACHE_NAMESPACES[sender], using=using)
+
+
+@receiver(m2m_changed, sender=Task.assignees.through)
+def invalidate_cached_assignees(sender, action, using, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        caching.invalidate_on_commit("tasks", using=using)
+
+
+for model in CACHE_NAMESPACES:
+    post_save.connect(invalidate_cached, sender=model, dispatch_uid=f"invalidate_cached_save_{model.__name__}")
+    post_delete.connect(invalidate_cached, sender=model, dispatch_uid=f"invalidate_cached_delete_{model.__name__}")
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_critical_path(sender, instance, using, **kwargs):
+    dependencies.invalidate_projects([instance.project_id], using=using)
+
+
+@receiver(post_save, sender=TaskDependency)
+@receiver(post_delete, sender=TaskDependency)
+def invalidate_dependency_critical_path(sender, instance, using, **kwargs):
+    dependencies.invalidate_task_projects([instance.task_id, instance.blocked_by_id], using=using)
+
+
+@receiver(m2m_changed, sender=Task.blocked_by.through)
+def invalidate_blocked_by_critical_path(sender, instance, action, pk_set, using, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        dependencies.invalidate_task_projects([instance.pk, *(pk_set or ())], using=using)
@@ -0,0 +1,129 @@
+"""
+Slow query log.
+
+``SlowQueryMiddleware`` times every query of a request. Queries slower than
+``SLOW_QUERY_THRESHOLD_MS`` are aggregated by view and normalized SQL fingerprint
+once the response is ready; the first time a fingerprint is seen its EXPLAIN
+plan is stored too. Fast queries only cost two ``perf_counter()`` calls.
+"""
+
+import hashlib
+import logging
+import re
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import SlowQuery
+
+
+logger = logging.getLogger(__name__)
+
+NORMALIZE_PATTERNS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def normalize(sql):
+    for pattern, replacement in NORMALIZE_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+class SlowQueryRecorder:
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.threshold:
+                self.slow.append((context["connection"].alias, sql, None if many else params, elapsed * 1000))
+
+
+class SlowQueryMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = getattr(settings, "SLOW_QUERY_THRESHOLD_MS", None)
+        if threshold is None:
+            return self.get_response(request)
+        recorder = SlowQueryRecorder(threshold / 1000)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        if recorder.slow:
+            view_name = request.resolver_match.view_name if request.resolver_match else ""
+            try:
+                record_slow_queries(view_name, recorder.slow)
+            except DatabaseError:
+                logger.exception("Could not store slow queries for %s", view_name)
+        return response
+
+
+def explain(alias, sql, params):
+    if not sql.lstrip().upper().startswith("SELECT") or params is None:
+        return ""
+    connection = connections[alias]
+    try:
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            return "\n".join(str(row[-1]) for row in cursor.fetchall())
+    except DatabaseError as exc:
+        return f"EXPLAIN failed: {exc}"
+
+
+def record_slow_queries(view_name, slow):
+    grouped = defaultdict(list)
+    for alias, sql, params, elapsed_ms in slow:
+        normalized = normalize(sql)
+        grouped[(fingerprint(normalized), normalized)].append((alias, sql, params, elapsed_ms))
+
+    for (fp, normalized), runs in grouped.items():
+        durations = [elapsed_ms for _, _, _, elapsed_ms in runs]
+        updated = SlowQuery.objects.filter(fingerprint=fp, view_name=view_name).update(
+            calls=F("calls") + len(runs),
+            total_ms=F("total_ms") + sum(durations),
+            max_ms=Greatest(F("max_ms"), max(durations)),
+            last_seen=timezone.now(),
+        )
+        if updated:
+            continue
+        alias, sql, params, _ = runs[0]
+        plan = "" if SlowQuery.objects.filter(fingerprint=fp).exists() else explain(alias, sql, params)
+        try:
+            with transaction.atomic():
+                SlowQuery.objects.create(
+                    fingerprint=fp,
+                    sql=normalized,
+                    view_name=view_name,
+                    calls=len(runs),
+                    total_ms=sum(durations),
+                    max_ms=max(durations),
+                    explain=plan,
+                )
+        except IntegrityError:
+            # Another worker recorded the same fingerprint first.
+            pass
@@ -7,12 +7,21 @@ from .views import (
     TaskCreateView,
     TaskUpdateView,
     TaskDeleteView,
+    TaskRestoreView,
+    TaskDependencyAddView,
+    TaskDependencyRemoveView,
+    TaskBulkActionView,
     WorkerListView,
     WorkerDetailView,
     TeamListView,
     ProjectListView,
     TeamDetailView,
     ProjectDetailView,
+    ProfileListView,
+    ProfileDetailView,
+    CalendarView,
+    task_events,
+    task_feed,
 )
 
 app_name = "task_manager"
@@ -24,10 +33,24 @@ urlpatterns = [
     path("task/create/", TaskCreateView.as_view(), name="task-create"),
     path("task/<int:pk>/update/", TaskUpdateView.as_view(), name="task-update"),
     path("task/<int:pk>/delete/", TaskDeleteView.as_view(), name="task-delete"),
+    path("task/<int:pk>/restore/", TaskRestoreView.as_view(), name="task-restore"),
+    path("task/<int:pk>/dependencies/", TaskDependencyAddView.as_view(), name="task-dependency-add"),
+    path(
+        "task/<int:pk>/dependencies/<int:blocker_pk>/remove/",
+        TaskDependencyRemoveView.as_view(),
+        name="task-dependency-remove",
+    ),
+    path("task/bulk/", TaskBulkActionView.as_view(), name="task-bulk"),
+    path("task/events/", task_events, name="task-events"),
     path("workers/", WorkerListView.as_view(), name="worker-list"),
     path("workers/<int:pk>/", WorkerDetailView.as_view(), name="worker-detail"),
     path("team/", TeamListView.as_view(), name="team-list"),
     path("team/<int:pk>/", TeamDetailView.as_view(), name="team-detail"),
     path("project/", ProjectListView.as_view(), name="project-list"),
     path("project/<int:pk>/", ProjectDetailView.as_view(), name="project-detail"),
+    path("calendar/", CalendarView.as_view(), name="calendar"),
+    path("calendar/worker/<int:pk>.ics", task_feed, {"kind": "worker"}, name="worker-feed"),
+    path("calendar/project/<int:pk>.ics", task_feed, {"kind": "project"}, name="project-feed"),
+    path("profiles/", ProfileListView.as_view(), name="profile-list"),
+    path("profiles/<str:profile_id>/", ProfileDetailView.as_view(), name="profile-detail"),
 ]
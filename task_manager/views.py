@@ -1,37 +1,216 @@
-from django.shortcuts import render
+import asyncio
+import calendar
+import copy
+import json
+from collections import defaultdict
+from datetime import date, timedelta
+from functools import partial
+from urllib.parse import urlencode
+
+from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Count, Window
+from django.db.models.functions import RowNumber
+from django.http import Http404, HttpResponse, HttpResponseForbidden, QueryDict, StreamingHttpResponse
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.views import generic
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.views.decorators.http import require_safe
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 
 from .models import (
-Worker, Task, Teams, Project
+Worker, Task, Teams, Project, ArchivedTask
 )
-from .forms import TaskCreateForm, TaskUpdateForm, TaskDeleteForm
+from .forms import TaskCreateForm, TaskUpdateForm, TaskDeleteForm, BulkTaskActionForm, TaskDependencyForm
+from .archive import restore_archived_task
+from . import bulk
+from . import caching
+from . import dependencies
+from . import history
+from . import profiling
+from .filters import TaskFacets
+from . import events
+from . import ical
+from . import lookups
+from . import search
+from . import sharding
+
+
+EVENT_STREAM_HEARTBEAT = 15
+
+# Task names listed per project on the project list; the rest are only counted.
+PROJECT_LIST_TASK_NAMES = 5
+
+# The calendar also shows the edges of the previous and following month, and links to them.
+CALENDAR_DATE_RANGE = (date(1, 2, 1), date(9999, 11, 30))
+
+
+def task_scope_queryset(scope, user):
+    if scope == "mine":
+        return Task.objects.filter(assignees=user).order_by("deadline")
+    return Task.objects.all()
+
+
+class TaskFacetMixin:
+    task_scope = "all"
+
+    def get_base_queryset(self):
+        return task_scope_queryset(self.task_scope, self.request.user)
+
+    def get_queryset(self):
+        self.facets = TaskFacets(self.request.GET, self.get_base_queryset())
+        return sharding.across_shards(self.facets.filter())
 
+    def facet_cache_key(self):
+        owner = self.request.user.pk if self.task_scope == "mine" else "all"
+        return f"task-facets:{self.task_scope}:{owner}:{self.facets.cache_key()}"
 
-class Homepage(LoginRequiredMixin, generic.ListView):
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        counts = caching.get_or_compute(self.facet_cache_key(), self.facets.counts, namespaces=("tasks",))
+        context["facets"] = self.facets.options(counts)
+        context["filter_query"] = self.facets.query_without_page()
+        context["bulk_form"] = BulkTaskActionForm(
+            initial={"scope": self.task_scope, "filter_query": context["filter_query"]}
+        )
+        return context
+
+
+class Homepage(LoginRequiredMixin, TaskFacetMixin, generic.ListView):
     model = Task
     context_object_name = "all_tasks_list"
     template_name = "task_manager/homepage.html"
     paginate_by = 10
 
 
-class TaskListView(LoginRequiredMixin, generic.ListView):
+class TaskListView(LoginRequiredMixin, TaskFacetMixin, generic.ListView):
     model = Task
     context_object_name = "worker_tasks_list"
     template_name = "task_manager/task_list.html"
     paginate_by = 10
+    task_scope = "mine"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["live_events"] = events.streaming_supported(self.request)
+        return context
+
+
+class TaskShardMixin:
 
     def get_queryset(self):
-        return Task.objects.filter(assignees=self.request.user).order_by("deadline")
+        return Task.objects.for_task(self.kwargs["pk"])
 
 
-class TaskDetailView(LoginRequiredMixin, generic.DetailView):
+class TaskDetailView(LoginRequiredMixin, TaskShardMixin, generic.DetailView):
     model = Task
     template_name = "task_manager/task_detail.html"
 
+    def get_object(self, queryset=None):
+        try:
+            return super().get_object(queryset)
+        except Http404:
+            return get_object_or_404(ArchivedTask, pk=self.kwargs["pk"])
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["is_archived"] = isinstance(self.object, ArchivedTask)
+        context["assignees"] = self.object.assignees.all() if context["is_archived"] else self.object.get_assignees()
+        context["history"] = Paginator(
+            history.task_history(self.object.pk), 10
+        ).get_page(self.request.GET.get("history_page"))
+        context["history_rows"] = history.describe(context["history"])
+        if not context["is_archived"]:
+            context["blockers"] = self.object.blocked_by.all()
+            context["blocks"] = self.object.blocks.all()
+            context["all_blockers_count"] = len(dependencies.blockers(self.object.pk))
+            context["dependency_form"] = TaskDependencyForm(task=self.object)
+        return context
+
+
+class TaskBulkActionView(LoginRequiredMixin, generic.FormView):
+    form_class = BulkTaskActionForm
+    http_method_names = ["post"]
+
+    def get_tasks(self, form):
+        """The selected task ids, or with "select all" the filtered queryset, updated in place."""
+        if form.cleaned_data["select_all"]:
+            queryset = task_scope_queryset(form.cleaned_data["scope"], self.request.user)
+            facets = TaskFacets(QueryDict(form.cleaned_data["filter_query"]), queryset)
+            return sharding.across_shards(facets.filter())
+        return [int(pk) for pk in self.request.POST.getlist("task_ids") if pk.isdigit()]
+
+    def form_valid(self, form):
+        tasks = self.get_tasks(form)
+        action = form.cleaned_data["action"]
+        if not form.cleaned_data["select_all"] and not tasks:
+            messages.warning(self.request, "No tasks selected.")
+        else:
+            user = self.request.user
+            if action == "complete":
+                message = f"Updated {bulk.complete_tasks(tasks, user=user)} task(s)."
+            elif action == "priority":
+                message = f"Updated {bulk.set_priority(tasks, form.cleaned_data['priority'], user=user)} task(s)."
+            elif action == "project":
+                try:
+                    message = f"Moved {bulk.move_to_project(tasks, form.cleaned_data['project'], user=user)} task(s)."
+                except ValidationError as error:
+                    messages.error(self.request, " ".join(error.messages))
+                    return redirect(self.get_success_url())
+            elif action == "assign":
+                message = f"Added {bulk.add_assignees(tasks, form.cleaned_data['workers'], user=user)} assignment(s)."
+            else:
+                message = f"Removed {bulk.remove_assignees(tasks, form.cleaned_data['workers'], user=user)} assignment(s)."
+            messages.success(self.request, message)
+        return redirect(self.get_success_url())
+
+    def form_invalid(self, form):
+        for errors in form.errors.values():
+            messages.error(self.request, " ".join(errors))
+        return redirect(self.get_success_url())
+
+    def get_success_url(self):
+        next_url = self.request.POST.get("next")
+        if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={self.request.get_host()}):
+            return next_url
+        return reverse_lazy("task_manager:task-list")
+
+
+class TaskRestoreView(LoginRequiredMixin, generic.View):
+
+    def post(self, request, pk):
+        archived = get_object_or_404(ArchivedTask, pk=pk)
+        task = restore_archived_task(archived)
+        return redirect("task_manager:task-detail", pk=task.pk)
+
+
+class TaskDependencyAddView(LoginRequiredMixin, generic.View):
+
+    def post(self, request, pk):
+        task = get_object_or_404(Task.objects.for_task(pk), pk=pk)
+        form = TaskDependencyForm(request.POST, task=task)
+        if form.is_valid():
+            try:
+                dependencies.add_dependency(task, form.cleaned_data["blocked_by"])
+            except ValidationError as error:
+                messages.error(request, " ".join(error.messages))
+        else:
+            messages.error(request, " ".join(form.errors["blocked_by"]))
+        return redirect("task_manager:task-detail", pk=task.pk)
+
+
+class TaskDependencyRemoveView(LoginRequiredMixin, generic.View):
+
+    def post(self, request, pk, blocker_pk):
+        task = get_object_or_404(Task.objects.for_task(pk), pk=pk)
+        dependencies.remove_dependency(task, get_object_or_404(Task.objects.for_task(blocker_pk), pk=blocker_pk))
+        return redirect("task_manager:task-detail", pk=task.pk)
+
 
 class TaskCreateView(LoginRequiredMixin, generic.CreateView):
     model = Task
@@ -40,14 +219,19 @@ class TaskCreateView(LoginRequiredMixin, generic.CreateView):
     success_url = reverse_lazy("task_manager:task-list")
 
 
-class TaskUpdateView(LoginRequiredMixin, generic.UpdateView):
+class TaskUpdateView(LoginRequiredMixin, TaskShardMixin, generic.UpdateView):
     model = Task
     form_class = TaskUpdateForm
     template_name = "task_manager/task_form.html"
     success_url = reverse_lazy("task_manager:task-list")
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        history.record_change(self.object, self.request.user, history.form_changes(form))
+        return response
+
 
-class TaskDeleteView(LoginRequiredMixin, generic.DeleteView):
+class TaskDeleteView(LoginRequiredMixin, TaskShardMixin, generic.DeleteView):
     model = Task
     form_class = TaskDeleteForm
     template_name = "task_manager/task_confirm_delete.html"
@@ -57,18 +241,16 @@ class WorkerListView(LoginRequiredMixin, generic.ListView):
     model = Worker
     template_name = "task_manager/worker_list.html"
     context_object_name = "workers"
+    paginate_by = 20
 
     def get_queryset(self):
-        query = self.request.GET.get("q")
-        queryset = Worker.objects.all()
-        if query:
-            queryset = queryset.filter(
-                Q(username__icontains=query) |
-                Q(first_name__icontains=query) |
-                Q(last_name__icontains=query) |
-                Q(team__name__icontains=query)
-            )
-        return queryset
+        return search.search_workers(self.request.GET.get("q", ""))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get("q", "").strip()
+        context["filter_query"] = urlencode({"q": query}) if query else ""
+        return context
 
 
 class WorkerDetailView(LoginRequiredMixin, generic.DetailView):
@@ -77,7 +259,11 @@ class WorkerDetailView(LoginRequiredMixin, generic.DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["tasks"] = self.object.tasks.all()
+        context["tasks"] = sharding.across_shards(self.object.tasks.all())
+        context["archived_tasks"] = Paginator(
+            self.object.archived_tasks.all(), 10
+        ).get_page(self.request.GET.get("archive_page"))
+        context["feed_url"] = ical.feed_url(self.request, self.object)
         return context
 
 
@@ -87,6 +273,10 @@ class TeamListView(LoginRequiredMixin, generic.ListView):
     context_object_name = "teams"
     paginate_by = 3
 
+    def get_queryset(self):
+        # Teams are a lookup table, already held by every process.
+        return lookups.all_objects(Teams)
+
 
 class TeamDetailView(LoginRequiredMixin, generic.DetailView):
     model = Teams
@@ -104,6 +294,51 @@ class ProjectListView(LoginRequiredMixin, generic.ListView):
     context_object_name = "projects"
     paginate_by = 3
 
+    def get_queryset(self):
+        # Projects are a lookup table, already held by every process.
+        return [project for project in lookups.all_objects(Project) if not project.is_pending_deletion]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        project_ids = [project.pk for project in context["projects"]]
+        summaries = caching.get_or_compute(
+            f"project-list:{','.join(map(str, project_ids))}",
+            partial(self.compute_task_summaries, project_ids),
+            namespaces=("projects", "tasks"),
+        )
+        # Copies: the lookup table's instances are shared by every request of the process.
+        context["projects"] = [copy.copy(project) for project in context["projects"]]
+        for project in context["projects"]:
+            project.task_summary = summaries.get(project.pk, "")
+        return context
+
+    @staticmethod
+    def compute_task_summaries(project_ids):
+        """The first task names and the task count of each project on one page, one query per shard."""
+        by_shard = defaultdict(list)
+        for project_id in project_ids:
+            by_shard[sharding.project_shard(project_id)].append(project_id)
+        names, counts = defaultdict(list), {}
+        for alias, shard_project_ids in by_shard.items():
+            rows = (
+                Task.objects.using(alias)
+                .filter(project_id__in=shard_project_ids)
+                .annotate(
+                    row=Window(RowNumber(), partition_by="project_id", order_by="pk"),
+                    total=Window(Count("pk"), partition_by="project_id"),
+                )
+                .filter(row__lte=PROJECT_LIST_TASK_NAMES)
+                .values_list("project_id", "name", "total")
+            )
+            for project_id, name, total in rows:
+                names[project_id].append(name)
+                counts[project_id] = total
+        summaries = {}
+        for project_id, project_names in names.items():
+            more = counts[project_id] - len(project_names)
+            summaries[project_id] = ", ".join(project_names) + (f" and {more} more" if more else "")
+        return summaries
+
 
 class ProjectDetailView(LoginRequiredMixin, generic.DetailView):
     model = Project
@@ -112,4 +347,138 @@ class ProjectDetailView(LoginRequiredMixin, generic.DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["tasks"] = self.object.tasks.all()
-        return context
\ No newline at end of file
+        context["feed_url"] = ical.feed_url(self.request, self.object)
+        context["critical_path"] = dependencies.critical_path(self.object.pk)
+        context["live_events"] = events.streaming_supported(self.request)
+        return context
+
+
+class CalendarView(LoginRequiredMixin, generic.TemplateView):
+    template_name = "task_manager/calendar.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        mode = "week" if self.request.GET.get("mode") == "week" else "month"
+        scope = "mine" if self.request.GET.get("scope") == "mine" else "all"
+        try:
+            day = date.fromisoformat(self.request.GET.get("date", ""))
+        except ValueError:
+            day = date.today()
+        if not CALENDAR_DATE_RANGE[0] <= day <= CALENDAR_DATE_RANGE[1]:
+            day = date.today()
+
+        if mode == "week":
+            start = day - timedelta(days=day.weekday())
+            weeks = [[start + timedelta(days=offset) for offset in range(7)]]
+            previous, following = start - timedelta(days=7), start + timedelta(days=7)
+        else:
+            weeks = calendar.Calendar().monthdatescalendar(day.year, day.month)
+            first = day.replace(day=1)
+            previous = (first - timedelta(days=1)).replace(day=1)
+            following = (first + timedelta(days=32)).replace(day=1)
+
+        tasks_by_day = defaultdict(list)
+        tasks = task_scope_queryset(scope, self.request.user).filter(deadline__range=(weeks[0][0], weeks[-1][-1]))
+        tasks = tasks.only("pk", "name", "deadline", "priority", "is_completed").order_by("deadline", "priority")
+        for task in sharding.across_shards(tasks):
+            tasks_by_day[task.deadline].append(task)
+
+        def query(**params):
+            return urlencode({"mode": mode, "scope": scope, "date": day.isoformat(), **params})
+
+        context.update({
+            "mode": mode,
+            "scope": scope,
+            "day": day,
+            "today": date.today(),
+            "weeks": [[(week_day, tasks_by_day[week_day]) for week_day in week] for week in weeks],
+            "previous_query": query(date=previous.isoformat()),
+            "next_query": query(date=following.isoformat()),
+            "month_query": query(mode="month"),
+            "week_query": query(mode="week"),
+            "mine_query": query(scope="mine"),
+            "all_query": query(scope="all"),
+            "feed_url": ical.feed_url(self.request, self.request.user),
+        })
+        return context
+
+
+@require_safe
+def task_feed(request, kind, pk):
+    if not request.user.is_authenticated and not ical.check_token(kind, pk, request.GET.get("token", "")):
+        return HttpResponseForbidden("A valid feed token is required.")
+    owner = get_object_or_404(ical.FEED_OWNERS[kind], pk=pk)
+    tasks = ical.feed_tasks(kind, pk)
+
+    # No Last-Modified: the latest updated_at doesn't change when tasks leave the feed.
+    etag = ical.feed_etag(owner, tasks)
+    response = get_conditional_response(request, etag=quote_etag(etag))
+    if response is None:
+        response = StreamingHttpResponse(
+            ical.stream_feed(request, owner, tasks), content_type="text/calendar; charset=utf-8"
+        )
+        response["Content-Disposition"] = f'inline; filename="{kind}-{pk}.ics"'
+    response["ETag"] = quote_etag(etag)
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+class StaffRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+
+class ProfileListView(StaffRequiredMixin, generic.TemplateView):
+    template_name = "task_manager/profile_list.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["profiles"] = profiling.recent_profiles()
+        return context
+
+
+class ProfileDetailView(StaffRequiredMixin, generic.TemplateView):
+    template_name = "task_manager/profile_detail.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["profile"] = profiling.load_profile(self.kwargs["profile_id"])
+        if context["profile"] is None:
+            raise Http404("No such profile.")
+        return context
+
+
+@login_required
+async def task_events(request):
+    if not events.streaming_supported(request):
+        # 204 tells EventSource not to reconnect.
+        return HttpResponse(status=204)
+    user = await request.auser()
+    project_id = request.GET.get("project")
+    if project_id and project_id.isdigit():
+        filters = {"project_id": int(project_id)}
+    else:
+        filters = {"user_id": user.pk}
+
+    async def stream():
+        subscription = events.get_backend().subscribe()
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), EVENT_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                event = events.event_matches(event, **filters)
+                if event:
+                    yield f"event: task\ndata: {json.dumps(event)}\n\n"
+        finally:
+            await subscription.close()
+
+    return StreamingHttpResponse(
+        stream(),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,110 @@
+"""
+Seeded test data built once and restored per test class.
+
+A ``SnapshotTestCase`` builds its dataset with ``build_snapshot()`` the first time
+it runs, dumps the database to a compact SQLite file with ``VACUUM INTO`` and, in
+every later class or run, copies that file into the test database with the SQLite
+backup API instead of repeating the ORM inserts. Files are keyed by the build code,
+the schema and the current date (datasets use relative deadlines), so a stale
+snapshot is never loaded; writing a new one deletes the stale files of the same
+dataset. Other databases build the data in ``setUpTestData``.
+"""
+
+import hashlib
+import inspect
+import os
+import sqlite3
+import uuid
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+
+from task_manager import lookups
+from task_manager.signals import LOOKUP_MODELS
+
+
+def snapshot_dir():
+    return Path(getattr(settings, "TEST_SNAPSHOT_DIR", settings.BASE_DIR / ".test_snapshots"))
+
+
+def _database():
+    connection.ensure_connection()
+    return connection.connection
+
+
+def _reset_caches():
+    # Restoring a file bypasses the ORM, so nothing cached about the old rows is valid.
+    cache.clear()
+    for model in LOOKUP_MODELS:
+        lookups.invalidate(model)
+
+
+class SnapshotTestCase(TestCase):
+    snapshot_name = None
+
+    _baseline = None
+
+    @classmethod
+    def build_snapshot(cls):
+        raise NotImplementedError("SnapshotTestCase subclasses must define build_snapshot().")
+
+    @classmethod
+    def snapshot_path(cls):
+        schema = "\n".join(
+            sql for (sql,) in _database().execute("SELECT sql FROM sqlite_master WHERE sql IS NOT NULL ORDER BY name")
+        )
+        source = inspect.getsource(cls.build_snapshot)
+        key = hashlib.sha1(f"{source}\n{schema}\n{date.today()}".encode()).hexdigest()[:16]
+        return snapshot_dir() / f"{cls.snapshot_name or cls.__name__}-{key}.sqlite3"
+
+    @classmethod
+    def _remove_stale_snapshots(cls, path):
+        pattern = f"{cls.snapshot_name or cls.__name__}-{'?' * 16}.sqlite3"
+        for stale in path.parent.glob(pattern):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+    @classmethod
+    def setUpClass(cls):
+        if connection.vendor == "sqlite":
+            cls._baseline = sqlite3.connect(":memory:")
+            _database().backup(cls._baseline)
+            path = cls.snapshot_path()
+            if path.exists():
+                snapshot = sqlite3.connect(path)
+                try:
+                    snapshot.backup(_database())
+                finally:
+                    snapshot.close()
+            else:
+                cls._write_snapshot(path)
+            _reset_caches()
+        super().setUpClass()
+
+    @classmethod
+    def _write_snapshot(cls, path):
+        cls.build_snapshot()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Parallel workers may build the same snapshot; each writes its own file first.
+        partial = path.with_name(f"{path.name}.{uuid.uuid4().hex}.partial")
+        _database().execute("VACUUM INTO ?", [str(partial)])
+        os.replace(partial, path)
+        cls._remove_stale_snapshots(path)
+
+    @classmethod
+    def setUpTestData(cls):
+        if cls._baseline is None:
+            cls.build_snapshot()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if cls._baseline is not None:
+            cls._baseline.backup(_database())
+            cls._baseline.close()
+            cls._baseline = None
+            _reset_caches()
@@ -0,0 +1,123 @@
+from datetime import date, timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from task_manager import lookups, sharding
+from task_manager.archive import archive_completed_tasks, restore_archived_task
+from task_manager.models import ArchivedTask, Project, Task, TaskType, Worker
+from tests.tests_events import RecordingBackend
+from tests.tests_sharding import requires_shards
+
+
+class ArchiveTests(TestCase):
+    # Every shard is archived.
+    databases = "__all__"
+
+    def setUp(self):
+        self.worker = Worker.objects.create(username="archiver")
+        self.task_type = TaskType.objects.create(name="Report")
+        self.project = Project.objects.create(name="Ops")
+        self.old_done = [
+            Task.objects.create(
+                name=f"Old {i}",
+                description="Done long ago",
+                deadline=date.today() - timedelta(days=200 + i),
+                is_completed=True,
+                task_type=self.task_type,
+                project=self.project,
+            )
+            for i in range(5)
+        ]
+        for task in self.old_done:
+            task.assignees.add(self.worker)
+        self.old_open = Task.objects.create(
+            name="Old open",
+            description="Still open",
+            deadline=date.today() - timedelta(days=200),
+            task_type=self.task_type,
+        )
+        self.recent_done = Task.objects.create(
+            name="Recent done",
+            description="Done yesterday",
+            deadline=date.today() - timedelta(days=1),
+            is_completed=True,
+            task_type=self.task_type,
+        )
+
+    def test_archive_moves_old_completed_tasks_in_batches(self):
+        archived = archive_completed_tasks(date.today() - timedelta(days=90), batch_size=2)
+
+        self.assertEqual(archived, 5)
+        self.assertEqual(Task.objects.count(), 2)
+        self.assertEqual(ArchivedTask.objects.count(), 5)
+        self.assertEqual(self.worker.archived_tasks.count(), 5)
+        self.assertEqual(self.worker.tasks.count(), 0)
+
+    @override_settings(TASK_EVENTS_BACKEND="tests.tests_events.RecordingBackend")
+    def test_each_batch_publishes_one_deleted_event(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            # Per batch, whatever its size: nine statements and three savepoint pairs. Any
+            # other, empty, shard costs a savepoint pair on "default".
+            with self.assertNumQueries(3 * 15 + 2 * (len(sharding.shards()) - 1)):
+                archive_completed_tasks(date.today() - timedelta(days=90), batch_size=2)
+
+        self.assertEqual([event["action"] for event in RecordingBackend.published], ["deleted"] * 3)
+        self.assertEqual(
+            sorted(task["id"] for event in RecordingBackend.published for task in event["tasks"]),
+            sorted(task.pk for task in self.old_done),
+        )
+        self.assertEqual(RecordingBackend.published[0]["tasks"][0]["assignees"], [self.worker.pk])
+
+    @requires_shards
+    def test_tasks_on_every_shard_are_archived_and_restored_there(self):
+        project = Project.objects.create(name="Sharded", shard="shard1")
+        self.addCleanup(lookups.invalidate, Project)
+        task = Task.objects.create(
+            name="Old sharded", description="-", deadline=date.today() - timedelta(days=200),
+            is_completed=True, task_type=self.task_type, project=project,
+        )
+        task.assignees.add(self.worker)
+
+        self.assertEqual(archive_completed_tasks(date.today() - timedelta(days=90)), 6)
+        self.assertFalse(Task.objects.using("shard1").exists())
+
+        restored = restore_archived_task(ArchivedTask.objects.get(pk=task.pk))
+        self.assertEqual(restored._state.db, "shard1")
+        self.assertEqual(restored.assignee_ids(), [self.worker.pk])
+
+    def test_restore_keeps_id_and_assignees(self):
+        archive_completed_tasks(date.today() - timedelta(days=90))
+        archived = ArchivedTask.objects.get(pk=self.old_done[0].pk)
+
+        task = restore_archived_task(archived)
+
+        self.assertEqual(task.pk, self.old_done[0].pk)
+        self.assertEqual(list(task.assignees.all()), [self.worker])
+        self.assertFalse(ArchivedTask.objects.filter(pk=task.pk).exists())
+
+    def test_archive_command(self):
+        out = StringIO()
+        call_command("archive_tasks", days=90, verbosity=0, stdout=out)
+        self.assertEqual(ArchivedTask.objects.count(), 5)
+        self.assertEqual(out.getvalue(), "")
+
+        call_command("archive_tasks", days=90, stdout=out)
+        self.assertIn("Archived 0 task(s)", out.getvalue())
+
+    def test_archived_task_readable_and_restorable_through_views(self):
+        archive_completed_tasks(date.today() - timedelta(days=90))
+        self.client.force_login(self.worker)
+        pk = self.old_done[0].pk
+
+        response = self.client.get(reverse("task_manager:task-detail", kwargs={"pk": pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["is_archived"])
+
+        response = self.client.get(reverse("task_manager:worker-detail", kwargs={"pk": self.worker.pk}))
+        self.assertEqual(response.context["archived_tasks"].paginator.count, 5)
+
+        response = self.client.post(reverse("task_manager:task-restore", kwargs={"pk": pk}))
+        self.assertRedirects(response, reverse("task_manager:task-detail", kwargs={"pk": pk}))
+        self.assertTrue(Task.objects.filter(pk=pk).exists())
@@ -0,0 +1,144 @@
+from datetime import date, timedelta
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from task_manager import bulk, history
+from task_manager.models import Project, Task, TaskChange, TaskType, Worker
+from tests.tests_events import RecordingBackend
+
+
+@override_settings(TASK_EVENTS_BACKEND="tests.tests_events.RecordingBackend")
+class BulkActionTests(TestCase):
+
+    def setUp(self):
+        RecordingBackend.published = []
+        self.worker = Worker.objects.create(username="bulk")
+        self.other = Worker.objects.create(username="other")
+        self.task_type = TaskType.objects.create(name="Sprint")
+        self.project = Project.objects.create(name="Next sprint")
+        self.tasks = [
+            Task.objects.create(
+                name=f"Sprint task {i}",
+                description="Close me",
+                deadline=date.today() + timedelta(days=i),
+                priority=Task.Priority.LOW,
+                task_type=self.task_type,
+            )
+            for i in range(5)
+        ]
+        for task in self.tasks:
+            task.assignees.add(self.worker)
+        self.ids = [task.pk for task in self.tasks]
+
+    # Each action reads the rows it changes for the history and writes them with one
+    # statement; the other two queries are the savepoint pair.
+
+    def test_complete_is_one_update_and_one_event(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(4):
+                bulk.complete_tasks(self.ids)
+
+        self.assertEqual(Task.objects.filter(is_completed=True).count(), 5)
+        self.assertEqual(len(RecordingBackend.published), 1)
+        self.assertEqual(len(RecordingBackend.published[0]["tasks"]), 5)
+
+    def test_filtered_queryset_is_updated_without_reading_every_id(self):
+        Task.objects.filter(pk=self.ids[0]).update(priority=Task.Priority.HIGH)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(4):
+                updated = bulk.set_priority(Task.objects.filter(priority=Task.Priority.LOW), Task.Priority.CRITICAL)
+
+        self.assertEqual(updated, 4)
+        self.assertEqual(Task.objects.filter(priority=Task.Priority.CRITICAL).count(), 4)
+        self.assertEqual(len(RecordingBackend.published[0]["tasks"]), 4)
+
+        with self.captureOnCommitCallbacks(execute=False):
+            with self.assertNumQueries(4):
+                removed = bulk.remove_assignees(Task.objects.filter(priority=Task.Priority.CRITICAL), [self.worker])
+        self.assertEqual(removed, 4)
+        self.assertEqual(self.worker.tasks.get(), self.tasks[0])
+
+    def test_assignee_changes_touch_only_the_through_table(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            with self.assertNumQueries(4):
+                bulk.add_assignees(self.ids, [self.other])
+        self.assertEqual(self.other.tasks.count(), 5)
+
+        with self.captureOnCommitCallbacks(execute=False):
+            with self.assertNumQueries(4):
+                bulk.remove_assignees(self.ids, [self.worker])
+        self.assertEqual(self.worker.tasks.count(), 0)
+
+    def test_actions_record_history_of_changed_tasks_only(self):
+        self.addCleanup(setattr, history.buffer, "entries", [])
+        bulk.set_priority(self.ids[:2], Task.Priority.HIGH)
+        history.buffer.flush()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.set_priority(self.ids, Task.Priority.HIGH, user=self.worker)
+            bulk.move_to_project(self.ids[:1], self.project, user=self.worker)
+            bulk.add_assignees(self.ids[:2], [self.worker, self.other], user=self.worker)
+            bulk.remove_assignees(self.ids[:1], [self.worker], user=self.worker)
+        self.assertEqual(history.buffer.flush(), 3 + 1 + 2 + 1)
+
+        changes = [(change.task_id, change.changes) for change in TaskChange.objects.filter(changed_by=self.worker)]
+        self.assertIn((self.ids[2], {"priority": [Task.Priority.LOW, Task.Priority.HIGH]}), changes)
+        self.assertNotIn(self.ids[0], [task_id for task_id, change in changes if "priority" in change])
+        self.assertIn((self.ids[0], {"project": [None, self.project.pk]}), changes)
+        self.assertIn((self.ids[1], {"assignees": {"added": [self.other.pk], "removed": []}}), changes)
+        self.assertIn((self.ids[0], {"assignees": {"added": [], "removed": [self.worker.pk]}}), changes)
+
+    def test_assignee_actions_return_the_links_changed(self):
+        self.assertEqual(bulk.add_assignees(self.ids[:2], [self.worker, self.other]), 2)
+        self.assertEqual(bulk.remove_assignees(self.ids, [self.other]), 2)
+        self.assertEqual(bulk.remove_assignees(self.ids, [self.other]), 0)
+
+    def test_admin_actions_ask_for_their_arguments(self):
+        self.worker.is_staff = self.worker.is_superuser = True
+        self.worker.save()
+        self.client.force_login(self.worker)
+        url = reverse("admin:task_manager_task_changelist")
+        selection = {"_selected_action": self.ids[:3]}
+
+        response = self.client.post(url, {"action": "move_to_project", **selection})
+        self.assertTemplateUsed(response, "admin/task_manager/task/action_form.html")
+        self.assertEqual(len(response.context["queryset"]), 3)
+
+        response = self.client.post(url, {"action": "move_to_project", "apply": "1", "project": self.project.pk, **selection})
+        self.assertRedirects(response, url)
+        self.assertEqual(self.project.tasks.count(), 3)
+
+        response = self.client.post(url, {"action": "add_assignees", "apply": "1", "workers": [self.other.pk], **selection}, follow=True)
+        self.assertContains(response, "Added 3 assignment(s).")
+        self.client.post(url, {"action": "remove_assignees", "apply": "1", "workers": [self.worker.pk], **selection})
+        self.assertEqual(self.worker.tasks.count(), 2)
+
+    def test_bulk_view_applies_to_selection_or_filter(self):
+        self.client.force_login(self.worker)
+        url = reverse("task_manager:task-bulk")
+
+        response = self.client.post(url, {
+            "action": "priority",
+            "priority": Task.Priority.CRITICAL,
+            "scope": "mine",
+            "task_ids": self.ids[:2],
+        })
+        self.assertRedirects(response, reverse("task_manager:task-list"))
+        self.assertEqual(Task.objects.filter(priority=Task.Priority.CRITICAL).count(), 2)
+
+        self.client.post(url, {
+            "action": "project",
+            "project": self.project.pk,
+            "scope": "all",
+            "select_all": "on",
+            "filter_query": "priority=Low",
+        })
+        self.assertEqual(self.project.tasks.count(), 3)
+
+    def test_bulk_view_requires_action_arguments(self):
+        self.client.force_login(self.worker)
+        self.client.post(reverse("task_manager:task-bulk"), {
+            "action": "assign", "scope": "mine", "task_ids": self.ids,
+        })
+        self.assertEqual(self.other.tasks.count(), 0)
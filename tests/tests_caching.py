@@ -0,0 +1,118 @@
+import threading
+import time
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from task_manager import bulk, caching
+from task_manager.models import Project, Task, TaskType, Worker
+
+
+class GetOrComputeTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self, value="fresh", delay=0):
+        def compute():
+            self.calls += 1
+            time.sleep(delay)
+            return value
+        return compute
+
+    def test_concurrent_misses_compute_once(self):
+        results = []
+        compute = self.compute(delay=0.2)
+        threads = [
+            threading.Thread(target=lambda: results.append(caching.get_or_compute("hot", compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ["fresh"] * 8)
+
+    def test_invalidation_recomputes_once(self):
+        caching.get_or_compute("hot", self.compute("old"), namespaces=("tasks",))
+        caching.invalidate("tasks")
+
+        self.assertEqual(caching.get_or_compute("hot", self.compute("new"), namespaces=("tasks",)), "new")
+        self.assertEqual(caching.get_or_compute("hot", self.compute("newer"), namespaces=("tasks",)), "new")
+        self.assertEqual(self.calls, 2)
+
+    def test_stale_value_is_served_while_another_process_refreshes(self):
+        caching.get_or_compute("hot", self.compute("old"), namespaces=("tasks",))
+        caching.invalidate("tasks")
+        token = caching._acquire("hot", 10)
+
+        self.assertEqual(caching.get_or_compute("hot", self.compute("new"), namespaces=("tasks",)), "old")
+        self.assertEqual(self.calls, 1)
+
+        caching._release("hot", token)
+        self.assertEqual(caching.get_or_compute("hot", self.compute("new"), namespaces=("tasks",)), "new")
+
+    def test_slow_values_are_refreshed_before_they_expire(self):
+        cache.set(
+            caching.ENTRY_KEY.format("hot"),
+            caching.CacheEntry("old", delta=3600, expires=time.time() + 1, generations=()),
+        )
+        self.assertEqual(caching.get_or_compute("hot", self.compute("new")), "new")
+
+    def test_fresh_values_are_not_refreshed_early(self):
+        caching.get_or_compute("hot", self.compute("old"))
+        self.assertEqual(caching.get_or_compute("hot", self.compute("new")), "old")
+
+
+class CachedListViewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.worker = Worker.objects.create(username="viewer")
+        self.client.force_login(self.worker)
+        self.task_type = TaskType.objects.create(name="Chore")
+        self.project = Project.objects.create(name="Garden")
+        self.task = Task.objects.create(
+            name="Mow", description="Lawn", deadline=date.today(), task_type=self.task_type, project=self.project
+        )
+
+    def test_project_list_is_cached_and_invalidated(self):
+        self.client.get(reverse("task_manager:project-list"))
+        with self.assertNumQueries(2):  # session and user
+            response = self.client.get(reverse("task_manager:project-list"))
+        self.assertContains(response, "Mow")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(
+                name="Weed", description="Beds", deadline=date.today(), task_type=self.task_type, project=self.project
+            )
+        self.assertContains(self.client.get(reverse("task_manager:project-list")), "Weed")
+
+    def test_project_list_summarises_the_tasks_of_its_page(self):
+        Task.objects.bulk_create(
+            Task(name=f"Weed {i}", description="Beds", deadline=date.today(), task_type=self.task_type,
+                 project=self.project)
+            for i in range(6)
+        )
+        with self.assertNumQueries(3):  # session, user and the page's task summaries
+            response = self.client.get(reverse("task_manager:project-list"))
+
+        garden = next(project for project in response.context["projects"] if project.pk == self.project.pk)
+        self.assertEqual(garden.task_summary, "Mow, Weed 0, Weed 1, Weed 2, Weed 3 and 2 more")
+
+    def status_counts(self):
+        response = self.client.get(reverse("task_manager:homepage"))
+        facet = next(facet for facet in response.context["facets"] if facet["name"] == "status")
+        return {option["value"]: option["count"] for option in facet["options"]}
+
+    def test_bulk_actions_invalidate_facet_counts(self):
+        self.assertEqual(self.status_counts(), {"open": 1, "completed": 0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.complete_tasks([self.task.pk])
+        self.assertEqual(self.status_counts(), {"open": 0, "completed": 1})
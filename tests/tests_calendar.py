@@ -0,0 +1,135 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+
+from task_manager import bulk, ical
+from task_manager.models import Project, Task, TaskType, Worker
+
+
+class CalendarViewTests(TestCase):
+
+    def setUp(self):
+        self.worker = Worker.objects.create(username="planner")
+        self.client.force_login(self.worker)
+        task_type = TaskType.objects.create(name="Milestone")
+        self.inside = Task.objects.create(
+            name="Ship beta", description="-", deadline=date(2026, 3, 17), task_type=task_type
+        )
+        self.inside.assignees.add(self.worker)
+        Task.objects.create(name="Plan gamma", description="-", deadline=date(2026, 3, 20), task_type=task_type)
+        Task.objects.create(name="Retro", description="-", deadline=date(2026, 5, 2), task_type=task_type)
+
+    def calendar_tasks(self, **params):
+        response = self.client.get(reverse("task_manager:calendar"), params)
+        return response, [task.name for week in response.context["weeks"] for _, tasks in week for task in tasks]
+
+    def test_month_shows_only_tasks_in_range(self):
+        response, names = self.calendar_tasks(date="2026-03-05")
+        self.assertEqual(names, ["Ship beta", "Plan gamma"])
+        self.assertEqual(response.context["weeks"][0][0][0], date(2026, 2, 23))
+        self.assertIn("date=2026-04-01", response.context["next_query"])
+
+    def test_week_and_scope(self):
+        _, names = self.calendar_tasks(date="2026-03-18", mode="week", scope="mine")
+        self.assertEqual(names, ["Ship beta"])
+
+    def test_dates_at_the_ends_of_the_calendar_fall_back_to_today(self):
+        for params in ({"date": "9999-12-15"}, {"date": "0001-01-03"}, {"date": "0001-01-03", "mode": "week"}):
+            response = self.client.get(reverse("task_manager:calendar"), params)
+            self.assertEqual(response.context["day"], date.today())
+
+        for params in ({"date": "9999-11-30"}, {"date": "0001-02-01", "mode": "week"}):
+            self.assertEqual(self.client.get(reverse("task_manager:calendar"), params).status_code, 200)
+
+
+class TaskFeedTests(TestCase):
+
+    def setUp(self):
+        self.worker = Worker.objects.create(username="subscriber")
+        self.project = Project.objects.create(name="Launch")
+        task_type = TaskType.objects.create(name="Deadline")
+        self.tasks = [
+            Task.objects.create(
+                name=f"Launch step {i}, part; one",
+                description="Line one\nLine two",
+                deadline=date.today() + timedelta(days=i),
+                task_type=task_type,
+                project=self.project,
+            )
+            for i in range(3)
+        ]
+        Task.objects.create(
+            name="Long gone", description="-", deadline=date.today() - timedelta(days=365),
+            task_type=task_type, project=self.project,
+        )
+        for task in self.tasks:
+            task.assignees.add(self.worker)
+        self.url = reverse("task_manager:project-feed", args=[self.project.pk])
+        self.token = ical.feed_token("project", self.project.pk)
+
+    def test_feed_needs_a_valid_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.url, {"token": "forged"}).status_code, 403)
+        other = ical.feed_token("worker", self.project.pk)
+        self.assertEqual(self.client.get(self.url, {"token": other}).status_code, 403)
+
+    def test_feed_streams_recent_tasks(self):
+        response = self.client.get(self.url, {"token": self.token})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        body = b"".join(response.streaming_content).decode()
+        self.assertTrue(body.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertEqual(body.count("BEGIN:VEVENT"), 3)
+        self.assertIn("SUMMARY:Launch step 0\\, part\\; one\r\n", body)
+        self.assertIn("DESCRIPTION:Line one\\nLine two\r\n", body)
+        self.assertNotIn("Long gone", body)
+
+        worker_feed = self.client.get(
+            reverse("task_manager:worker-feed", args=[self.worker.pk]),
+            {"token": ical.feed_token("worker", self.worker.pk)},
+        )
+        self.assertEqual(b"".join(worker_feed.streaming_content).decode().count("BEGIN:VEVENT"), 3)
+
+    def test_unchanged_feed_is_not_modified(self):
+        response = self.client.get(self.url, {"token": self.token})
+        etag = response["ETag"]
+
+        with self.assertNumQueries(2):
+            cached = self.client.get(self.url, {"token": self.token}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+
+        bulk.set_priority([self.tasks[0].pk], Task.Priority.HIGH)
+        changed = self.client.get(self.url, {"token": self.token}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+    def test_removed_tasks_change_the_feed(self):
+        response = self.client.get(self.url, {"token": self.token})
+        self.assertFalse(response.has_header("Last-Modified"))
+
+        self.tasks[0].delete()
+        changed = self.client.get(self.url, {"token": self.token}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, 200)
+
+    def test_swapped_tasks_change_the_etag(self):
+        tasks = [
+            Task.objects.create(
+                name=f"Swap {i}", description="-", deadline=date.today(), task_type=self.tasks[0].task_type
+            )
+            for i in range(4)
+        ]
+        Task.objects.filter(pk__in=[task.pk for task in tasks]).update(updated_at=tasks[0].updated_at)
+        outer, inner = [tasks[0].pk, tasks[3].pk], [tasks[1].pk, tasks[2].pk]
+        # Same number of tasks, same sum of ids and same latest change.
+        self.assertEqual(sum(outer), sum(inner))
+
+        first = ical.feed_etag(self.project, Task.objects.filter(pk__in=outer))
+        self.assertNotEqual(first, ical.feed_etag(self.project, Task.objects.filter(pk__in=inner)))
+
+    def test_long_lines_are_folded(self):
+        folded = ical.fold("SUMMARY:" + "é" * 80)
+        lines = folded.split("\r\n")[:-1]
+        self.assertTrue(all(len(line.encode()) <= 75 for line in lines))
+        self.assertEqual("".join(line[1:] if i else line for i, line in enumerate(lines)), "SUMMARY:" + "é" * 80)
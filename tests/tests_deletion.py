@@ -0,0 +1,113 @@
+from datetime import date, timedelta
+from django.contrib.messages import get_messages
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from task_manager.deletion import run_deletion_job, schedule_deletion
+from task_manager.models import DeletionJob, Project, Task, TaskType, Worker
+from tests.tests_events import RecordingBackend
+
+
+class ChunkedDeletionTests(TestCase):
+    # Jobs look for child tasks on every shard.
+    databases = "__all__"
+
+    def setUp(self):
+        self.worker = Worker.objects.create(username="deleter")
+        self.task_type = TaskType.objects.create(name="Chore")
+        self.other_type = TaskType.objects.create(name="Feature")
+        self.project = Project.objects.create(name="Legacy")
+        for i in range(7):
+            task = Task.objects.create(
+                name=f"Chore {i}",
+                description="Routine",
+                deadline=date.today(),
+                task_type=self.task_type,
+                project=self.project,
+            )
+            task.assignees.add(self.worker)
+        self.survivor = Task.objects.create(
+            name="Survivor",
+            description="Other type",
+            deadline=date.today(),
+            task_type=self.other_type,
+            project=self.project,
+        )
+
+    def test_schedule_marks_pending_and_defers_work(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            job = schedule_deletion(self.task_type)
+
+        self.assertTrue(callbacks)
+        self.assertEqual(job.total, 7)
+        self.assertTrue(TaskType.objects.get(pk=self.task_type.pk).is_pending_deletion)
+        self.assertEqual(Task.objects.filter(task_type=self.task_type).count(), 7)
+
+    def test_task_type_job_deletes_children_in_batches(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            job = schedule_deletion(self.task_type)
+
+        job = run_deletion_job(job, batch_size=3)
+
+        self.assertEqual(job.status, DeletionJob.Status.DONE)
+        self.assertEqual(job.processed, 7)
+        self.assertEqual(job.progress(), "100%")
+        self.assertFalse(TaskType.objects.filter(pk=self.task_type.pk).exists())
+        self.assertEqual(list(Task.objects.all()), [self.survivor])
+        self.assertEqual(self.worker.tasks.count(), 0)
+
+    @override_settings(TASK_EVENTS_BACKEND="tests.tests_events.RecordingBackend")
+    def test_deleted_tasks_are_published_once_per_batch(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            job = schedule_deletion(self.task_type)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            run_deletion_job(job, batch_size=3)
+
+        self.assertEqual([len(event["tasks"]) for event in RecordingBackend.published], [3, 3, 1])
+        self.assertEqual(RecordingBackend.published[0]["tasks"][0]["assignees"], [self.worker.pk])
+
+    def test_project_job_detaches_tasks(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            job = schedule_deletion(self.project)
+
+        run_deletion_job(job, batch_size=3)
+
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        self.assertEqual(Task.objects.filter(project__isnull=True).count(), 8)
+
+    def test_object_pending_deletion_is_not_scheduled_twice(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            schedule_deletion(self.task_type)
+            self.assertIsNone(schedule_deletion(self.task_type))
+
+        self.assertEqual(DeletionJob.objects.count(), 1)
+
+    def test_job_running_in_another_worker_is_not_claimed(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            job = schedule_deletion(self.task_type)
+        DeletionJob.objects.filter(pk=job.pk).update(status=DeletionJob.Status.RUNNING, heartbeat_at=timezone.now())
+
+        self.assertIsNone(run_deletion_job(job))
+        self.assertEqual(Task.objects.filter(task_type=self.task_type).count(), 7)
+
+        DeletionJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(run_deletion_job(job).status, DeletionJob.Status.DONE)
+
+    def test_admin_delete_only_reports_the_scheduled_job(self):
+        self.worker.is_staff = self.worker.is_superuser = True
+        self.worker.save()
+        self.client.force_login(self.worker)
+
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.post(
+                reverse("admin:task_manager_tasktype_delete", args=[self.task_type.pk]), {"post": "yes"}
+            )
+
+        self.assertRedirects(response, reverse("admin:task_manager_tasktype_changelist"))
+        self.assertEqual(
+            [str(message) for message in get_messages(response.wsgi_request)],
+            ["Deletion of Chore was scheduled, see Deletion jobs for progress."],
+        )
+        self.assertTrue(TaskType.objects.filter(pk=self.task_type.pk).exists())
@@ -0,0 +1,102 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.urls import reverse
+
+from task_manager import bulk, dependencies
+from task_manager.models import Project, Task, TaskDependency, TaskType, Worker
+
+
+class DependencyTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.project = Project.objects.create(name="Release")
+        self.task_type = TaskType.objects.create(name="Step")
+        # design -> build -> test -> ship, plus docs which only waits for design.
+        self.design = self.task(date(2026, 1, 10))
+        self.build = self.task(date(2026, 1, 5))
+        self.test = self.task(date(2026, 1, 20))
+        self.ship = self.task(date(2026, 1, 15))
+        self.docs = self.task(date(2026, 1, 30))
+        dependencies.add_dependency(self.build, self.design)
+        dependencies.add_dependency(self.test, self.build)
+        dependencies.add_dependency(self.ship, self.test)
+        dependencies.add_dependency(self.docs, self.design)
+
+    def task(self, deadline):
+        return Task.objects.create(
+            name=f"Task {deadline:%d}", description="-", deadline=deadline,
+            task_type=self.task_type, project=self.project,
+        )
+
+    def test_closure_uses_one_query(self):
+        with self.assertNumQueries(1):
+            upstream = dependencies.blockers(self.ship.pk)
+        self.assertEqual(upstream, {self.test.pk: 1, self.build.pk: 2, self.design.pk: 3})
+        self.assertEqual(set(dependencies.dependents(self.design.pk)), {self.build.pk, self.test.pk, self.ship.pk, self.docs.pk})
+
+    def test_cycles_are_rejected(self):
+        with self.assertRaises(ValidationError):
+            dependencies.add_dependency(self.design, self.ship)
+        with self.assertRaises(ValidationError):
+            dependencies.add_dependency(self.design, self.design)
+        self.assertEqual(TaskDependency.objects.count(), 4)
+
+    def test_critical_path_follows_the_latest_chain(self):
+        path = dependencies.compute_critical_path(self.project.pk)
+
+        self.assertEqual(path.finish, date(2026, 1, 30))
+        self.assertEqual([step.id for step in path.steps], [self.docs.pk])
+        self.assertEqual([step.id for step in path.late], [self.build.pk, self.ship.pk])
+        self.assertEqual(path.late[1].earliest_finish, date(2026, 1, 20))
+
+        Task.objects.filter(pk=self.design.pk).update(deadline=date(2026, 2, 10))
+        path = dependencies.compute_critical_path(self.project.pk)
+        self.assertEqual(path.finish, date(2026, 2, 10))
+        self.assertEqual([step.id for step in path.steps], [self.design.pk, self.build.pk, self.test.pk, self.ship.pk])
+
+    def test_critical_path_is_cached_until_the_project_changes(self):
+        dependencies.critical_path(self.project.pk)
+        with self.assertNumQueries(0):
+            dependencies.critical_path(self.project.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.docs.deadline = date(2026, 1, 1)
+            self.docs.save()
+        self.assertEqual(dependencies.critical_path(self.project.pk).finish, date(2026, 1, 20))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            dependencies.remove_dependency(self.ship, self.test)
+        self.assertEqual([step.id for step in dependencies.critical_path(self.project.pk).steps], [self.test.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.complete_tasks([self.test.pk])
+        self.assertEqual(dependencies.critical_path(self.project.pk).finish, date(2026, 1, 15))
+
+    def test_views_add_and_show_dependencies(self):
+        self.client.force_login(Worker.objects.create(username="planner"))
+        response = self.client.post(
+            reverse("task_manager:task-dependency-add", args=[self.design.pk]), {"blocked_by": self.ship.pk}, follow=True
+        )
+        self.assertContains(response, "would create a cycle")
+
+        # A task of another project, and one already blocking ship.
+        other = Task.objects.create(
+            name="Elsewhere", description="-", deadline=date(2026, 1, 1), task_type=self.ship.task_type
+        )
+        url = reverse("task_manager:task-dependency-add", args=[self.ship.pk])
+        for blocked_by in (other.pk, self.test.pk):
+            response = self.client.post(url, {"blocked_by": blocked_by}, follow=True)
+            self.assertContains(response, "Enter the id of an open task of the same project")
+        self.assertContains(self.client.post(url, {"blocked_by": "many"}, follow=True), "Enter a whole number.")
+        self.assertEqual(TaskDependency.objects.count(), 4)
+
+        response = self.client.get(reverse("task_manager:task-detail", args=[self.ship.pk]))
+        self.assertEqual(response.context["all_blockers_count"], 3)
+
+        response = self.client.get(reverse("task_manager:project-detail", args=[self.project.pk]))
+        self.assertContains(response, "Critical path")
+        self.assertContains(response, "earliest Jan. 20, 2026")
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import date
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from task_manager import events
+from task_manager.models import Project, Task, TaskType, Worker
+from task_manager.views import task_events
+
+
+class RecordingBackend(events.LocalBackend):
+    published = []
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        RecordingBackend.published = []
+
+    def publish(self, event):
+        RecordingBackend.published.append(event)
+        super().publish(event)
+
+
+class LocalBackendTests(SimpleTestCase):
+
+    def test_subscribers_receive_published_events(self):
+        backend = events.LocalBackend()
+
+        async def roundtrip():
+            subscription = backend.subscribe()
+            backend.publish({"action": "created", "tasks": []})
+            event = await asyncio.wait_for(subscription.get(), 1)
+            await subscription.close()
+            return event
+
+        self.assertEqual(asyncio.run(roundtrip()), {"action": "created", "tasks": []})
+        self.assertFalse(backend._subscriptions)
+
+    def test_event_matches_filters_by_user_and_project(self):
+        event = {
+            "action": "updated",
+            "tasks": [
+                {"id": 1, "project": 5, "assignees": [1]},
+                {"id": 2, "project": 6, "assignees": [2]},
+            ],
+        }
+        self.assertEqual([t["id"] for t in events.event_matches(event, user_id=2)["tasks"]], [2])
+        self.assertEqual([t["id"] for t in events.event_matches(event, project_id=5)["tasks"]], [1])
+        self.assertIsNone(events.event_matches(event, project_id=7))
+
+
+@override_settings(TASK_EVENTS_BACKEND="tests.tests_events.RecordingBackend")
+class TaskSignalEventTests(TestCase):
+
+    def setUp(self):
+        self.worker = Worker.objects.create(username="listener")
+        self.task_type = TaskType.objects.create(name="Bug")
+        self.project = Project.objects.create(name="Live")
+
+    def test_create_publishes_with_assignees_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(
+                name="Live task",
+                description="Pushed",
+                deadline=date.today(),
+                task_type=self.task_type,
+                project=self.project,
+            )
+            task.assignees.add(self.worker)
+
+        created = RecordingBackend.published[0]
+        self.assertEqual(created["action"], "created")
+        self.assertEqual(created["tasks"][0]["assignees"], [self.worker.pk])
+        self.assertEqual(created["tasks"][0]["project"], self.project.pk)
+
+    def test_delete_publishes_deleted_event(self):
+        task = Task.objects.create(
+            name="Gone", description="Soon", deadline=date.today(), task_type=self.task_type
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+
+        self.assertEqual(RecordingBackend.published[-1]["action"], "deleted")
+
+    def test_event_stream_requires_login_and_streams_sse(self):
+        url = reverse("task_manager:task-events")
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        request = AsyncRequestFactory().get(url)
+
+        async def auser():
+            return self.worker
+
+        request.auser = auser
+
+        async def first_chunk():
+            response = await task_events(request)
+            chunks = aiter(response.streaming_content)
+            chunk = await anext(chunks)
+            await chunks.aclose()
+            return response, chunk
+
+        response, chunk = asyncio.run(first_chunk())
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(chunk, b"retry: 5000\n\n")
+
+    def test_event_stream_is_not_served_under_wsgi(self):
+        self.client.force_login(self.worker)
+
+        self.assertEqual(self.client.get(reverse("task_manager:task-events")).status_code, 204)
+        response = self.client.get(reverse("task_manager:task-list"))
+        self.assertFalse(response.context["live_events"])
+        self.assertNotContains(response, "task_events.js")
@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+from django.http import QueryDict
+from django.test import TestCase
+from django.urls import reverse
+
+from task_manager.filters import TaskFacets
+from task_manager.models import Project, Task, TaskType, Worker
+
+
+class TaskFacetTests(TestCase):
+
+    def setUp(self):
+        self.worker = Worker.objects.create(username="facet")
+        self.bug = TaskType.objects.create(name="Bug")
+        self.feature = TaskType.objects.create(name="Feature")
+        self.project = Project.objects.create(name="Core")
+        specs = [
+            (Task.Priority.HIGH, self.bug, self.project, False, -3),
+            (Task.Priority.HIGH, self.feature, self.project, False, 5),
+            (Task.Priority.CRITICAL, self.bug, None, False, 2),
+            (Task.Priority.LOW, self.bug, self.project, True, -10),
+        ]
+        for i, (priority, task_type, project, done, days) in enumerate(specs):
+            task = Task.objects.create(
+                name=f"Task {i}",
+                description="Faceted",
+                deadline=date.today() + timedelta(days=days),
+                priority=priority,
+                task_type=task_type,
+                project=project,
+                is_completed=done,
+            )
+            task.assignees.add(self.worker)
+
+    def test_counts_come_from_one_query(self):
+        facets = TaskFacets(QueryDict(""), Task.objects.all())
+        with self.assertNumQueries(1):
+            counts = facets.counts()
+
+        self.assertEqual(counts["priority"]["High"], 2)
+        self.assertEqual(counts["task_type"][str(self.bug.pk)], 3)
+        self.assertEqual(counts["project"]["none"], 1)
+        self.assertEqual(counts["status"]["completed"], 1)
+        self.assertEqual(counts["overdue"]["1"], 1)
+
+    def test_selected_facet_counts_ignore_their_own_filter(self):
+        facets = TaskFacets(QueryDict("priority=High&task_type=%d" % self.bug.pk), Task.objects.all())
+
+        self.assertEqual(facets.filter().count(), 1)
+        counts = facets.counts()
+        self.assertEqual(counts["priority"]["Critical"], 1)
+        self.assertEqual(counts["task_type"][str(self.feature.pk)], 1)
+
+    def test_list_views_filter_and_expose_facets(self):
+        self.client.force_login(self.worker)
+
+        response = self.client.get(reverse("task_manager:task-list") + "?priority=High&page=1")
+        self.assertEqual(len(response.context["worker_tasks_list"]), 2)
+        self.assertEqual(response.context["filter_query"], "priority=High")
+
+        response = self.client.get(reverse("task_manager:homepage") + "?overdue=1")
+        self.assertEqual(len(response.context["all_tasks_list"]), 1)
+        priority = response.context["facets"][0]
+        self.assertEqual(priority["name"], "priority")
+        self.assertEqual([option["count"] for option in priority["options"]], [0, 0, 1, 0])
@@ -0,0 +1,141 @@
+from datetime import date, timedelta
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from task_manager import history
+from task_manager.models import Project, Task, TaskChange, TaskType, Worker
+
+
+class TaskHistoryTests(TestCase):
+
+    def setUp(self):
+        # Other test classes leave entries of their rolled-back tasks in the shared buffer.
+        history.buffer.entries = []
+        self.worker = Worker.objects.create(username="auditor")
+        self.other = Worker.objects.create(username="helper")
+        self.bug = TaskType.objects.create(name="Bug")
+        self.feature = TaskType.objects.create(name="Feature")
+        self.task = Task.objects.create(
+            name="Audited",
+            description="Watch me",
+            deadline=date.today(),
+            task_type=self.bug,
+        )
+        self.task.assignees.add(self.worker)
+        self.client.force_login(self.worker)
+
+    def tearDown(self):
+        history.buffer.entries = []
+
+    def update(self, **changes):
+        data = {
+            "name": self.task.name,
+            "description": self.task.description,
+            "deadline": self.task.deadline,
+            "priority": self.task.priority,
+            "task_type": self.task.task_type_id,
+            "assignees": [self.worker.pk],
+            **changes,
+        }
+        url = reverse("task_manager:task-update", kwargs={"pk": self.task.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, data)
+
+    def test_update_records_compact_diff_after_flush(self):
+        new_deadline = date.today() + timedelta(days=3)
+        self.update(deadline=new_deadline, task_type=self.feature.pk, assignees=[self.other.pk])
+
+        self.assertEqual(TaskChange.objects.count(), 0)
+        self.assertEqual(history.buffer.flush(), 1)
+
+        change = TaskChange.objects.get()
+        self.assertEqual(change.changed_by, self.worker)
+        self.assertEqual(change.changes, {
+            "deadline": [date.today().isoformat(), new_deadline.isoformat()],
+            "task_type": [self.bug.pk, self.feature.pk],
+            "assignees": {"added": [self.other.pk], "removed": [self.worker.pk]},
+        })
+
+    def test_unchanged_save_records_nothing(self):
+        self.update()
+        self.assertEqual(history.buffer.flush(), 0)
+
+    def test_buffer_flushes_in_one_bulk_insert_at_size_threshold(self):
+        buffer = history.ChangeBuffer(size=3, interval=3600)
+        entries = [
+            TaskChange(task_id=self.task.pk, changed_at=timezone.now(), changes={"name": ["a", "b"]})
+            for _ in range(3)
+        ]
+        buffer.append(entries[0])
+        buffer.append(entries[1])
+        self.assertEqual(TaskChange.objects.count(), 0)
+        with self.assertNumQueries(1):
+            buffer.append(entries[2])
+        self.assertEqual(TaskChange.objects.count(), 3)
+
+    def test_history_tab_reads_paginated_history(self):
+        for priority in ("High", "Low", "Critical"):
+            self.update(priority=priority)
+            self.task.refresh_from_db()
+
+        response = self.client.get(reverse("task_manager:task-detail", kwargs={"pk": self.task.pk}))
+        self.assertEqual(response.context["history"].paginator.count, 3)
+        entry, rows = response.context["history_rows"][0]
+        self.assertEqual(rows, [("Priority", "Low", "Critical")])
+
+    def test_admin_edits_record_history(self):
+        self.worker.is_staff = self.worker.is_superuser = True
+        self.worker.save()
+        project = Project.objects.create(name="Admin")
+        Task.objects.filter(pk=self.task.pk).update(project=project)
+        url = reverse("admin:task_manager_task_change", args=[self.task.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {
+                "name": self.task.name,
+                "description": self.task.description,
+                "deadline": self.task.deadline,
+                "priority": Task.Priority.HIGH,
+                "task_type": self.bug.pk,
+                "project": project.pk,
+                "assignees": [self.worker.pk, self.other.pk],
+            })
+        self.assertEqual(response.status_code, 302)
+        history.buffer.flush()
+
+        self.assertEqual(TaskChange.objects.get().changes, {
+            "priority": [Task.Priority.MEDIUM, Task.Priority.HIGH],
+            "assignees": {"added": [self.other.pk], "removed": []},
+        })
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("admin:task_manager_task_changelist"), {
+                "action": "mark_completed", "_selected_action": [self.task.pk],
+            })
+        history.buffer.flush()
+        self.assertEqual(TaskChange.objects.latest("pk").changes, {"is_completed": [False, True]})
+
+
+class ChangeBufferTimerTests(TransactionTestCase):
+
+    def test_timer_flushes_entries_without_further_changes(self):
+        task = Task.objects.create(
+            name="Quiet", description="-", deadline=date.today(), task_type=TaskType.objects.create(name="Bug")
+        )
+        buffer = history.ChangeBuffer(size=100, interval=0.05)
+        buffer.append(TaskChange(task_id=task.pk, changed_at=timezone.now(), changes={"name": ["a", "b"]}))
+        self.assertEqual(TaskChange.objects.count(), 0)
+
+        buffer.timer.join(timeout=5)
+        self.assertEqual(TaskChange.objects.count(), 1)
+        self.assertIsNone(buffer.timer)
+
+    def test_flush_cancels_the_timer(self):
+        buffer = history.ChangeBuffer(size=100, interval=3600)
+        buffer.extend([])
+        timer = buffer.timer
+        buffer.flush()
+        self.assertIsNone(buffer.timer)
+        timer.join(timeout=5)
+        self.assertFalse(timer.is_alive())
@@ -0,0 +1,62 @@
+from django.test import TestCase, override_settings
+
+from task_manager import lookups
+from task_manager.checks import check_shared_cache
+from task_manager.forms import TaskCreateForm
+from task_manager.models import Position, TaskType, Worker
+
+
+class LookupCacheTests(TestCase):
+
+    def setUp(self):
+        self.position = Position.objects.create(name="Developer")
+        self.bug = TaskType.objects.create(name="Bug")
+        self.feature = TaskType.objects.create(name="Feature")
+        self.workers = [
+            Worker.objects.create(username=f"dev{i}", position=self.position) for i in range(3)
+        ]
+
+    def test_form_choices_and_worker_positions_need_no_lookup_queries(self):
+        list(TaskCreateForm().fields["task_type"].choices)
+        lookups.all_objects(Position)
+
+        # Only the assignee count and select remain; task types and positions come from memory.
+        with self.assertNumQueries(2):
+            choices = list(TaskCreateForm().fields["assignees"].choices)
+            task_types = list(TaskCreateForm().fields["task_type"].choices)
+
+        self.assertEqual([label for _, label in choices], ["dev0 (Developer)", "dev1 (Developer)", "dev2 (Developer)"])
+        self.assertEqual([label for _, label in task_types][1:], ["Bug", "Feature"])
+
+    def test_save_and_delete_invalidate_the_table(self):
+        self.assertEqual(lookups.get(TaskType, self.bug.pk).name, "Bug")
+
+        self.bug.name = "Defect"
+        self.bug.save()
+        self.assertEqual(lookups.get(TaskType, self.bug.pk).name, "Defect")
+
+        self.feature.delete()
+        self.assertEqual([obj.name for obj in lookups.all_objects(TaskType)], ["Defect"])
+
+    def test_pending_deletion_types_are_not_offered_or_accepted(self):
+        TaskType.objects.filter(pk=self.bug.pk).update(is_pending_deletion=True)
+        lookups.invalidate(TaskType)
+
+        field = TaskCreateForm().fields["task_type"]
+        self.assertNotIn(self.bug.pk, [value for value, _ in field.choices if value])
+        form = TaskCreateForm(data={"task_type": self.bug.pk})
+        form.is_valid()
+        self.assertIn("task_type", form.errors)
+
+    def test_types_created_by_another_process_are_accepted(self):
+        lookups.all_objects(TaskType)
+        # bulk_create sends no signals, like a save made in another worker.
+        chore = TaskType.objects.bulk_create([TaskType(name="Chore")])[0]
+        self.assertIsNone(lookups.get(TaskType, chore.pk))
+
+        self.assertEqual(TaskCreateForm().fields["task_type"].clean(chore.pk), chore)
+
+    def test_deploy_check_requires_a_shared_cache(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ["task_manager.W001"])
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}):
+            self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,52 @@
+import tempfile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from task_manager import profiling
+from task_manager.models import Worker
+
+
+class ProfilerMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(PROFILE_DIR=self.directory.name)
+        self.settings_override.enable()
+        self.staff = Worker.objects.create(username="staff", is_staff=True)
+        self.worker = Worker.objects.create(username="plain")
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.directory.cleanup()
+
+    def test_untriggered_and_non_staff_requests_are_not_profiled(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse("task_manager:homepage"))
+        self.client.get(reverse("task_manager:homepage") + "?_profile=0&x_profile=1")
+        self.client.get(reverse("task_manager:homepage"), HTTP_X_PROFILE="0")
+        self.client.force_login(self.worker)
+        self.client.get(reverse("task_manager:homepage") + "?_profile=1")
+
+        self.assertEqual(profiling.recent_profiles(), [])
+
+    def test_staff_can_profile_by_parameter_or_header(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse("task_manager:homepage") + "?_profile=1")
+        self.client.get(reverse("task_manager:task-list"), HTTP_X_PROFILE="1")
+
+        profiles = profiling.recent_profiles()
+        self.assertEqual(len(profiles), 2)
+        self.assertEqual({profile["view"] for profile in profiles}, {"task_manager:homepage", "task_manager:task-list"})
+        self.assertTrue(all(profile["queries"] for profile in profiles))
+
+        response = self.client.get(reverse("task_manager:profile-list"))
+        self.assertEqual(len(response.context["profiles"]), 2)
+
+        response = self.client.get(reverse("task_manager:profile-detail", args=[profiles[0]["id"]]))
+        self.assertTrue(response.context["profile"]["top_functions"])
+        self.assertTrue(response.context["profile"]["hottest_queries"])
+
+    def test_profiles_page_is_staff_only(self):
+        self.client.force_login(self.worker)
+        response = self.client.get(reverse("task_manager:profile-list"))
+        self.assertEqual(response.status_code, 403)
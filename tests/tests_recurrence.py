@@ -0,0 +1,71 @@
+from datetime import date
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from task_manager.models import RecurringTask, Task, TaskType, Worker
+from task_manager.recurrence import generate_recurring_tasks, occurrences
+
+
+class RecurrenceTests(TestCase):
+
+    def setUp(self):
+        self.task_type = TaskType.objects.create(name="Routine")
+        self.worker = Worker.objects.create(username="reporter")
+
+    def template(self, **kwargs):
+        template = RecurringTask.objects.create(
+            name=kwargs.pop("name", "Weekly report"), description="-", task_type=self.task_type, **kwargs
+        )
+        template.assignees.add(self.worker)
+        return template
+
+    def test_occurrence_dates(self):
+        weekly = RecurringTask(frequency="weekly", interval=2, weekdays="0,4", starts_on=date(2026, 3, 4))
+        self.assertEqual(
+            occurrences(weekly, date(2026, 3, 1), date(2026, 3, 31)),
+            [date(2026, 3, 6), date(2026, 3, 16), date(2026, 3, 20), date(2026, 3, 30)],
+        )
+        monthly = RecurringTask(frequency="monthly", interval=1, starts_on=date(2026, 1, 31), ends_on=date(2026, 4, 15))
+        self.assertEqual(
+            occurrences(monthly, date(2026, 1, 1), date(2026, 12, 31)),
+            [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31)],
+        )
+        daily = RecurringTask(frequency="daily", interval=3, starts_on=date(2026, 3, 1))
+        self.assertEqual(occurrences(daily, date(2026, 3, 5), date(2026, 3, 12)), [date(2026, 3, 7), date(2026, 3, 10)])
+
+    def test_generation_is_idempotent_and_links_assignees(self):
+        template = self.template(frequency="weekly", starts_on=date(2026, 3, 2))
+
+        created = generate_recurring_tasks(today=date(2026, 3, 1), horizon_days=20)
+        self.assertEqual(created, 3)
+        tasks = Task.objects.filter(recurrence=template)
+        self.assertEqual(
+            list(tasks.values_list("deadline", flat=True)), [date(2026, 3, 2), date(2026, 3, 9), date(2026, 3, 16)]
+        )
+        self.assertEqual(self.worker.tasks.count(), 3)
+
+        RecurringTask.objects.update(generated_until=None)
+        self.assertEqual(generate_recurring_tasks(today=date(2026, 3, 1), horizon_days=20), 0)
+        self.assertEqual(generate_recurring_tasks(today=date(2026, 3, 1), horizon_days=27), 1)
+        self.assertEqual(tasks.count(), 4)
+
+    def test_query_count_does_not_grow_with_templates(self):
+        def queries(count):
+            RecurringTask.objects.all().delete()
+            for i in range(count):
+                self.template(name=f"Daily {i}", frequency="daily", starts_on=date(2026, 3, 1))
+            with CaptureQueriesContext(connection) as captured:
+                generate_recurring_tasks(today=date(2026, 3, 1), horizon_days=6)
+            return len(captured)
+
+        # Small enough that SQLite doesn't split the inserts on its bind variable limit.
+        self.assertEqual(queries(2), queries(12))
+        self.assertEqual(Task.objects.filter(recurrence__isnull=False).count(), 12 * 7)
+
+    def test_command(self):
+        self.template(frequency="daily", starts_on=date.today())
+        call_command("generate_recurring_tasks", "--days", "2", stdout=open("/dev/null", "w"))
+        self.assertEqual(Task.objects.count(), 3)
@@ -0,0 +1,45 @@
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from task_manager import lookups
+from task_manager.models import Position, Teams, Worker
+from task_manager.search import search_workers
+
+
+class WorkerSearchTests(TestCase):
+
+    def setUp(self):
+        position = Position.objects.create(name="Engineer")
+        self.alpha = Teams.objects.create(name="Alpha squad")
+        self.exact = Worker.objects.create(username="al", first_name="Bob", position=position)
+        self.prefix = Worker.objects.create(username="zed", first_name="Alice", position=position)
+        self.team_member = Worker.objects.create(username="carl", first_name="Carl", team=self.alpha)
+        self.other = Worker.objects.create(username="dora", first_name="Dora", last_name="Kallas")
+        self.viewer = Worker.objects.create(username="viewer")
+
+    def test_results_are_ranked(self):
+        self.assertEqual(list(search_workers("Al")), [self.exact, self.prefix, self.team_member])
+
+    def test_prefix_matches_only(self):
+        self.assertEqual(list(search_workers("alla")), [])
+        self.assertEqual(list(search_workers("kal")), [self.other])
+
+    def test_lookups_use_the_lower_indexes(self):
+        with connection.cursor() as cursor:
+            sql, params = search_workers("al").query.sql_with_params()
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("worker_username_lower_idx", plan)
+        self.assertNotIn("SCAN task_manager_worker", plan)
+
+    def test_view_is_paginated_without_per_row_queries(self):
+        for i in range(25):
+            Worker.objects.create(username=f"bulk{i:02}", position=self.exact.position, team=self.alpha)
+        self.client.force_login(self.viewer)
+        lookups.all_objects(Teams)
+
+        with self.assertNumQueries(4):  # session, user, count, page
+            response = self.client.get(reverse("task_manager:worker-list"), {"q": "bulk"})
+        self.assertEqual(len(response.context["workers"]), 20)
+        self.assertContains(response, "?q=bulk&page=2")
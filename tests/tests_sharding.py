@@ -0,0 +1,293 @@
+import threading
+from datetime import date, timedelta
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from task_manager import bulk, dependencies, ical, lookups, sharding
+from task_manager.deletion import run_deletion_job, schedule_deletion
+from task_manager.models import DeletionJob, Project, RecurringTask, Task, TaskType, Worker
+from task_manager.recurrence import generate_recurring_tasks
+
+SHARDS = {"default", "shard1", "shard2"}
+
+requires_shards = skipUnless(
+    SHARDS <= set(settings.TASK_SHARDS), "run with --settings=smart_task_manager.settings_test_sharded"
+)
+
+
+class ShardedDataMixin:
+    # The runner sets up the databases of skipped tests too, so only ask for configured ones.
+    databases = SHARDS & set(settings.DATABASES)
+
+    def setUp(self):
+        cache.clear()
+        lookups.invalidate(Project)
+        # Other tests must not see these projects' shards in the process-local lookup table.
+        self.addCleanup(lookups.invalidate, Project)
+        self.small = Project.objects.create(name="Small")
+        self.big = Project.objects.create(name="Big", shard="shard1")
+        self.huge = Project.objects.create(name="Huge", shard="shard2")
+        self.task_type = TaskType.objects.create(name="Chore")
+        self.worker = Worker.objects.create(username="sharded")
+
+    def task(self, project, days, **fields):
+        task = Task.objects.create(
+            name=f"{project} +{days}", description="-", deadline=date.today() + timedelta(days=days),
+            task_type=self.task_type, project=project, **fields,
+        )
+        task.assignees.add(self.worker)
+        return task
+
+
+@requires_shards
+class ShardRoutingTests(ShardedDataMixin, TestCase):
+
+    def test_tasks_and_assignees_live_on_the_project_shard(self):
+        task = self.task(self.big, 1)
+
+        self.assertEqual(task._state.db, "shard1")
+        self.assertGreaterEqual(task.pk, sharding.SHARD_ID_SPAN)
+        self.assertEqual(sharding.task_shard(task.pk), "shard1")
+        self.assertFalse(Task.objects.using("default").filter(pk=task.pk).exists())
+        self.assertEqual(
+            list(Task.assignees.through.objects.using("shard1").values_list("task_id", "worker_id")),
+            [(task.pk, self.worker.pk)],
+        )
+        self.assertEqual(Task.objects.for_task(task.pk).get(pk=task.pk), task)
+
+    def test_tasks_without_a_shard_stay_on_the_first_one(self):
+        task = self.task(self.small, 1)
+        orphan = self.task(None, 2)
+
+        self.assertEqual({task._state.db, orphan._state.db}, {"default"})
+        self.assertLess(task.pk, sharding.SHARD_ID_SPAN)
+
+    def test_related_tasks_are_read_from_the_project_shard(self):
+        task = self.task(self.huge, 1)
+
+        self.assertEqual(list(self.huge.tasks.all()), [task])
+        self.assertEqual(list(Task.objects.for_project(self.huge.pk)), [task])
+        self.assertEqual(list(self.worker.tasks.all()), [])
+
+    def test_shards_only_hold_task_tables(self):
+        tables = connections["shard1"].introspection.table_names()
+
+        self.assertIn(Task._meta.db_table, tables)
+        self.assertIn(Task.assignees.through._meta.db_table, tables)
+        self.assertNotIn(Worker._meta.db_table, tables)
+        self.assertNotIn(Project._meta.db_table, tables)
+
+    def test_unknown_shards_are_rejected(self):
+        project = Project(name="Lost", shard="nowhere")
+
+        with self.assertRaises(ValidationError):
+            project.full_clean()
+
+    def test_merged_tasks_follow_deadline_order(self):
+        expected = [self.task(project, days) for days, project in enumerate([self.big, self.small, self.huge] * 3)]
+        merged = sharding.across_shards(Task.objects.filter(assignees=self.worker))
+
+        self.assertIsInstance(merged, sharding.MergedTasks)
+        self.assertEqual(merged.count(), 9)
+        self.assertEqual(list(merged[2:5]), expected[2:5])
+        self.assertEqual(merged[0], expected[0])
+        self.assertEqual(list(merged), expected)
+
+    def test_bulk_actions_run_on_every_shard(self):
+        tasks = [self.task(self.small, 1), self.task(self.big, 2), self.task(self.huge, 3)]
+
+        self.assertEqual(bulk.complete_tasks([task.pk for task in tasks]), 3)
+        for task in tasks:
+            self.assertTrue(Task.objects.for_task(task.pk).get(pk=task.pk).is_completed)
+
+    def test_bulk_actions_run_on_filtered_querysets_of_every_shard(self):
+        tasks = [self.task(self.small, 1), self.task(self.big, 2), self.task(self.huge, 3)]
+
+        self.assertEqual(bulk.set_priority(sharding.across_shards(Task.objects.all()), Task.Priority.CRITICAL), 3)
+        for task in tasks:
+            self.assertEqual(Task.objects.for_task(task.pk).get(pk=task.pk).priority, Task.Priority.CRITICAL)
+        with self.assertRaises(ValidationError):
+            bulk.move_to_project(sharding.across_shards(Task.objects.all()), self.small)
+
+    def test_tasks_are_not_moved_between_shards(self):
+        task = self.task(self.small, 1)
+
+        with self.assertRaises(ValidationError):
+            bulk.move_to_project([task.pk], self.big)
+        self.assertEqual(bulk.move_to_project([task.pk], None), 1)
+
+    def test_commit_hooks_wait_for_the_shard_transaction(self):
+        task = self.task(self.big, 1)
+
+        with self.captureOnCommitCallbacks(using="default") as on_default, \
+                self.captureOnCommitCallbacks(using="shard1") as on_shard:
+            bulk.complete_tasks([task.pk])
+            task.save()
+        self.assertEqual(on_default, [])
+        self.assertTrue(on_shard)
+
+    def test_dependencies_stay_on_one_shard(self):
+        first, second, other = self.task(self.big, 3), self.task(self.big, 2), self.task(self.small, 1)
+
+        dependencies.add_dependency(second, first)
+        self.assertEqual(dependencies.blockers(second.pk), {first.pk: 1})
+        self.assertEqual([step.id for step in dependencies.compute_critical_path(self.big.pk).steps], [first.pk, second.pk])
+        with self.assertRaises(ValidationError):
+            dependencies.add_dependency(second, other)
+
+    def test_recurring_tasks_are_generated_on_the_project_shard(self):
+        template = RecurringTask.objects.create(
+            name="Standup", description="-", task_type=self.task_type, project=self.big,
+            frequency="daily", starts_on=date(2026, 3, 1),
+        )
+        template.assignees.add(self.worker)
+
+        self.assertEqual(generate_recurring_tasks(today=date(2026, 3, 1), horizon_days=3), 4)
+        self.assertFalse(Task.objects.using("default").exists())
+        self.assertEqual(Task.objects.for_project(self.big.pk).filter(recurrence=template).count(), 4)
+        self.assertEqual(Task.assignees.through.objects.using("shard1").filter(worker=self.worker).count(), 4)
+
+    def test_deletion_jobs_clean_up_every_shard(self):
+        tasks = [self.task(self.small, 1), self.task(self.big, 2), self.task(self.huge, 3)]
+
+        with self.captureOnCommitCallbacks(execute=False):
+            job = schedule_deletion(self.big)
+        self.assertEqual(job.total, 1)
+        run_deletion_job(job)
+        self.assertIsNone(Task.objects.using("shard1").get(pk=tasks[1].pk).project_id)
+
+        with self.captureOnCommitCallbacks(execute=False):
+            job = schedule_deletion(self.task_type)
+        job = run_deletion_job(job)
+        self.assertEqual((job.status, job.processed), (DeletionJob.Status.DONE, 3))
+        for alias in SHARDS:
+            self.assertFalse(Task.objects.using(alias).exists())
+
+
+@requires_shards
+class ShardedViewTests(ShardedDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.worker)
+
+    def test_task_list_merges_shards_in_deadline_order(self):
+        tasks = [self.task(project, days) for days, project in enumerate([self.huge, self.big, self.small] * 4)]
+
+        response = self.client.get(reverse("task_manager:task-list"))
+        self.assertEqual(list(response.context["worker_tasks_list"]), tasks[:10])
+        self.assertEqual(response.context["paginator"].count, 12)
+
+        response = self.client.get(reverse("task_manager:task-list"), {"page": 2})
+        self.assertEqual(list(response.context["worker_tasks_list"]), tasks[10:])
+
+    def test_facet_counts_cover_every_shard(self):
+        self.task(self.small, 1)
+        self.task(self.big, 2)
+        self.task(self.big, 3)
+
+        response = self.client.get(reverse("task_manager:task-list"))
+        project_facet = next(facet for facet in response.context["facets"] if facet["name"] == "project")
+        counts = {option["label"]: option["count"] for option in project_facet["options"]}
+        self.assertEqual(counts, {"Big": 2, "Small": 1})
+
+    def test_task_crud_uses_the_task_shard(self):
+        task = self.task(self.huge, 1)
+
+        response = self.client.get(reverse("task_manager:task-detail", args=[task.pk]))
+        self.assertEqual(response.context["task"], task)
+
+        response = self.client.post(reverse("task_manager:task-update", args=[task.pk]), {
+            "name": "Renamed", "description": "-", "deadline": task.deadline, "priority": Task.Priority.LOW,
+            "task_type": self.task_type.pk, "assignees": [self.worker.pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Task.objects.using("shard2").get(pk=task.pk).name, "Renamed")
+
+        self.client.post(reverse("task_manager:task-delete", args=[task.pk]))
+        self.assertFalse(Task.objects.using("shard2").filter(pk=task.pk).exists())
+
+    def test_project_pages_read_their_shard(self):
+        task = self.task(self.big, 1)
+
+        response = self.client.get(reverse("task_manager:project-detail", args=[self.big.pk]))
+        self.assertEqual(list(response.context["tasks"]), [task])
+
+        response = self.client.get(reverse("task_manager:project-list"))
+        big = next(project for project in response.context["projects"] if project.pk == self.big.pk)
+        self.assertEqual(big.task_summary, task.name)
+
+    def test_admin_lists_and_edits_tasks_on_their_shard(self):
+        self.worker.is_staff = self.worker.is_superuser = True
+        self.worker.save()
+        task = self.task(self.big, 1)
+        other = Worker.objects.create(username="other")
+        changelist = reverse("admin:task_manager_task_changelist")
+
+        self.assertEqual(list(self.client.get(changelist).context["cl"].result_list), [])
+        response = self.client.get(changelist, {"shard": "shard1"})
+        self.assertEqual(list(response.context["cl"].result_list), [task])
+        self.assertContains(response, "Big")
+
+        url = reverse("admin:task_manager_task_change", args=[task.pk])
+        self.assertEqual(self.client.get(url).context["original"], task)
+        data = {
+            "name": "Edited", "description": "-", "deadline": task.deadline, "priority": Task.Priority.LOW,
+            "task_type": self.task_type.pk, "project": self.big.pk, "assignees": [other.pk],
+        }
+        self.assertEqual(self.client.post(url, data).status_code, 302)
+        self.assertEqual(Task.objects.using("shard1").get(pk=task.pk).name, "Edited")
+        self.assertEqual(Task.objects.using("shard1").get(pk=task.pk).assignee_ids(), [other.pk])
+
+        response = self.client.post(url, {**data, "project": self.small.pk})
+        self.assertIn("project", response.context["adminform"].form.errors)
+
+    def test_worker_feed_merges_shards(self):
+        self.task(self.big, 2)
+        self.task(self.small, 1)
+
+        response = self.client.get(reverse("task_manager:worker-feed", args=[self.worker.pk]))
+        body = b"".join(response.streaming_content).decode()
+        self.assertLess(body.index("SUMMARY:Small +1"), body.index("SUMMARY:Big +2"))
+        self.assertEqual(ical.feed_etag(self.worker, ical.feed_tasks("worker", self.worker.pk)), response["ETag"].strip('"'))
+
+
+@requires_shards
+class FanOutTests(ShardedDataMixin, TransactionTestCase):
+
+    def test_shards_are_queried_concurrently_outside_transactions(self):
+        self.task(self.small, 1)
+        self.task(self.big, 2)
+        threads = set()
+
+        def count(queryset):
+            threads.add(threading.get_ident())
+            return queryset.count()
+
+        merged = sharding.across_shards(Task.objects.all())
+        self.assertEqual(sharding.fan_out(count, merged.querysets), [1, 1, 0])
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_pool_threads_run_the_callers_query_wrappers(self):
+        self.task(self.big, 2)
+        seen = []
+
+        def wrapper(execute, sql, params, many, context):
+            seen.append(context["connection"].alias)
+            return execute(sql, params, many, context)
+
+        merged = sharding.across_shards(Task.objects.all())
+        with connections["default"].execute_wrapper(wrapper), connections["shard1"].execute_wrapper(wrapper):
+            self.assertEqual(merged.count(), 1)
+        self.assertEqual(sorted(seen), ["default", "shard1"])
+
+        threads = set()
+        with sharding.inline_fan_out():
+            sharding.fan_out(lambda queryset: threads.add(threading.get_ident()), merged.querysets)
+        self.assertEqual(threads, {threading.get_ident()})
@@ -0,0 +1,67 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from task_manager import slow_queries
+from task_manager.models import SlowQuery, Worker
+
+
+class NormalizeTests(TestCase):
+
+    def test_literals_and_in_lists_are_replaced(self):
+        self.assertEqual(
+            slow_queries.normalize("SELECT  *\n FROM t1 WHERE name = 'o''k' AND id IN (1, 2, 3) LIMIT 21"),
+            "SELECT * FROM t1 WHERE name = ? AND id IN (...) LIMIT ?",
+        )
+        self.assertEqual(
+            slow_queries.normalize('SELECT "a"."id" FROM "a" WHERE "a"."id" IN (%s, %s)'),
+            slow_queries.normalize('SELECT "a"."id" FROM "a" WHERE "a"."id" IN (%s)'),
+        )
+
+
+class SlowQueryMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.worker = Worker.objects.create(username="worker")
+        self.client.force_login(self.worker)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=10_000)
+    def test_fast_queries_are_not_logged(self):
+        self.client.get(reverse("task_manager:homepage"))
+        self.assertFalse(SlowQuery.objects.exists())
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_queries_are_aggregated_by_fingerprint_with_explain(self):
+        self.client.get(reverse("task_manager:homepage"))
+        logged = SlowQuery.objects.filter(view_name="task_manager:homepage")
+        self.assertTrue(logged.exists())
+
+        self.client.get(reverse("task_manager:homepage"))
+        session_query = logged.get(sql__contains="django_session")
+        self.assertEqual(session_query.calls, 2)
+        self.assertIn("?", session_query.sql)
+        self.assertTrue(all(query.total_ms >= query.max_ms for query in logged))
+
+        selects = logged.filter(sql__startswith="SELECT")
+        self.assertTrue(selects.exists())
+        self.assertTrue(all(query.explain for query in selects))
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_explain_is_only_captured_for_new_fingerprints(self):
+        self.client.get(reverse("task_manager:homepage"))
+        self.client.get(reverse("task_manager:task-list"))
+
+        session_query = SlowQuery.objects.filter(sql__contains="django_session")
+        self.assertEqual(session_query.count(), 2)
+        self.assertEqual(session_query.exclude(explain="").count(), 1)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_command_prints_top_offenders(self):
+        self.client.get(reverse("task_manager:homepage"))
+        out = StringIO()
+        call_command("slow_queries", "--limit", "3", "--order", "calls", "--clear", stdout=out)
+
+        self.assertIn("task_manager:homepage", out.getvalue())
+        self.assertFalse(SlowQuery.objects.exists())
@@ -0,0 +1,63 @@
+import tempfile
+from pathlib import Path
+
+from django.db import connection
+from django.test import TestCase
+
+from task_manager import lookups
+from task_manager.models import Position, Teams, Worker
+
+from .snapshots import SnapshotTestCase
+
+
+class SnapshotTests(SnapshotTestCase):
+    snapshot_name = "snapshot-tests"
+
+    @classmethod
+    def build_snapshot(cls):
+        team = Teams.objects.create(name="Snapshot Team")
+        position = Position.objects.create(name="Snapshot Position")
+        for number in range(3):
+            Worker.objects.create(username=f"snapshot{number}", team=team, position=position)
+
+    def test_dataset_is_restored(self):
+        self.assertEqual(Worker.objects.filter(username__startswith="snapshot").count(), 3)
+        self.assertEqual(Worker.objects.get(username="snapshot0").team.name, "Snapshot Team")
+
+    def test_snapshot_file_is_written(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Snapshots are SQLite files.")
+        self.assertTrue(self.snapshot_path().exists())
+
+    def test_writing_a_snapshot_removes_stale_ones(self):
+        with tempfile.TemporaryDirectory() as directory:
+            current, stale, other = (
+                Path(directory, name) for name in (
+                    "snapshot-tests-0123456789abcdef.sqlite3",
+                    "snapshot-tests-fedcba9876543210.sqlite3",
+                    "snapshot-tests-extra-fedcba9876543210.sqlite3",
+                )
+            )
+            for path in (current, stale, other):
+                path.touch()
+
+            self._remove_stale_snapshots(current)
+
+            self.assertEqual(sorted(Path(directory).iterdir()), sorted([current, other]))
+
+    def test_lookups_see_restored_rows(self):
+        self.assertIn("Snapshot Team", [team.name for team in lookups.all_objects(Teams)])
+
+    def test_changes_are_rolled_back_between_tests(self):
+        Worker.objects.filter(username="snapshot1").delete()
+        self.assertEqual(Worker.objects.filter(username__startswith="snapshot").count(), 2)
+
+    def test_changes_do_not_leak_into_other_tests(self):
+        self.assertTrue(Worker.objects.filter(username="snapshot1").exists())
+
+
+class SnapshotTeardownTests(TestCase):
+
+    def test_snapshot_rows_are_gone_outside_snapshot_classes(self):
+        self.assertFalse(Worker.objects.filter(username__startswith="snapshot").exists())
+        self.assertNotIn("Snapshot Team", [team.name for team in lookups.all_objects(Teams)])
@@ -1,5 +1,4 @@
 from datetime import date, timedelta
-from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
@@ -8,67 +7,88 @@ from task_manager.models import (
 )
 from task_manager.forms import TaskCreateForm, TaskUpdateForm
 
+from .snapshots import SnapshotTestCase
+
 User = get_user_model()
 
 
-class SetupMixin(TestCase):
+class SetupMixin(SnapshotTestCase):
+    snapshot_name = "views"
 
-    def setUp(self):
+    @classmethod
+    def build_snapshot(cls):
         # Create positions
-        self.position_dev = Position.objects.create(name="Developer")
-        self.position_manager = Position.objects.create(name="Manager")
+        position_dev = Position.objects.create(name="Developer")
+        position_manager = Position.objects.create(name="Manager")
 
         # Create teams
-        self.team_backend = Teams.objects.create(name="Backend Team")
-        self.team_frontend = Teams.objects.create(name="Frontend Team")
+        team_backend = Teams.objects.create(name="Backend Team")
+        team_frontend = Teams.objects.create(name="Frontend Team")
 
         # Create projects
-        self.project_website = Project.objects.create(name="Website Redesign")
-        self.project_mobile = Project.objects.create(name="Mobile App")
+        project_website = Project.objects.create(name="Website Redesign")
+        project_mobile = Project.objects.create(name="Mobile App")
 
         # Create task types
-        self.task_type_bug = TaskType.objects.create(name="Bug Fix")
-        self.task_type_feature = TaskType.objects.create(name="Feature")
+        task_type_bug = TaskType.objects.create(name="Bug Fix")
+        task_type_feature = TaskType.objects.create(name="Feature")
 
         # Create workers
-        self.worker1 = Worker.objects.create_user(
+        worker1 = Worker.objects.create_user(
             username="testuser1",
             password="testpass123",
-            position=self.position_dev,
-            team=self.team_backend,
+            position=position_dev,
+            team=team_backend,
             first_name="John",
             last_name="Doe"
         )
 
-        self.worker2 = Worker.objects.create_user(
+        Worker.objects.create_user(
             username="testuser2",
             password="testpass123",
-            position=self.position_manager,
-            team=self.team_frontend,
+            position=position_manager,
+            team=team_frontend,
             first_name="Jane",
             last_name="Smith"
         )
 
         # Create tasks
-        self.task_assigned = Task.objects.create(
+        task_assigned = Task.objects.create(
             name="Test Assigned Task",
             description="Test Description for assigned task",
             deadline=date.today() + timedelta(days=7),
             priority=Task.Priority.HIGH,
-            task_type=self.task_type_bug,
-            project=self.project_website
+            task_type=task_type_bug,
+            project=project_website
         )
-        self.task_assigned.assignees.add(self.worker1)
+        task_assigned.assignees.add(worker1)
 
-        self.task_unassigned = Task.objects.create(
+        Task.objects.create(
             name="Test Unassigned Task",
             description="Test Description for unassigned task",
             deadline=date.today() + timedelta(days=14),
             priority=Task.Priority.MEDIUM,
-            task_type=self.task_type_feature,
-            project=self.project_mobile
+            task_type=task_type_feature,
+            project=project_mobile
         )
 
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.position_dev = Position.objects.get(name="Developer")
+        cls.position_manager = Position.objects.get(name="Manager")
+        cls.team_backend = Teams.objects.get(name="Backend Team")
+        cls.team_frontend = Teams.objects.get(name="Frontend Team")
+        cls.project_website = Project.objects.get(name="Website Redesign")
+        cls.project_mobile = Project.objects.get(name="Mobile App")
+        cls.task_type_bug = TaskType.objects.get(name="Bug Fix")
+        cls.task_type_feature = TaskType.objects.get(name="Feature")
+        cls.worker1 = Worker.objects.get(username="testuser1")
+        cls.worker2 = Worker.objects.get(username="testuser2")
+        cls.task_assigned = Task.objects.get(name="Test Assigned Task")
+        cls.task_unassigned = Task.objects.get(name="Test Unassigned Task")
+
+    def setUp(self):
         # Login with worker1
         self.client.login(username="testuser1", password="testpass123")
 
@@ -211,7 +231,7 @@ class TaskCreateViewTests(SetupMixin):
         }
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, 200)  # Stays on same page
-        self.assertFormError(response, "form", "name", "This field is required.")
+        self.assertFormError(response.context["form"], "name", "This field is required.")
 
 
 class TaskUpdateViewTests(SetupMixin):
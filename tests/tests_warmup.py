@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.test import TestCase
+
+from smart_task_manager.warmup import warm_up
+
+
+class WarmupTests(TestCase):
+    # warm_database() connects to every configured database, task shards included.
+    databases = "__all__"
+
+    def test_warm_up_covers_urls_templates_and_database(self):
+        steps = {step.name: step for step in warm_up()}
+
+        self.assertEqual(set(steps), {"urls", "templates", "database"})
+        self.assertGreaterEqual(steps["urls"].count, 12)
+        self.assertGreaterEqual(steps["templates"].count, 14)
+        self.assertEqual(steps["database"].count, len(settings.DATABASES))